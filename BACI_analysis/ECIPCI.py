@@ -1,67 +1,60 @@
-# Standalone script version of ECIPCI.ipynb — generates CZE complexity outputs from BACI trade data.
-# Usage: python ECIPCI.py (run from the BACI_analysis directory)
+# Standalone script version of ECIPCI.ipynb — generates country complexity outputs from BACI trade data.
+# Usage: python ECIPCI.py [--countries CZE SVK ...] [--workers N] [--years 2024 ...] [--full] [--refresh-taxonomy]
+#        (run from the BACI_analysis directory)
+# By default only years whose inputs changed since the last run (see outputs/manifest.json) are recomputed;
+# the other years are reused from outputs/ and cache/complexity/. Each country gets outputs/{ISO3}_{year}.csv.
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 from ecomplexity import ecomplexity
 from ecomplexity import proximity
 import pandas as pd
+from baci_ingest import load_baci_year, baci_digest, file_sha256
+from concentration import calculate_hhi
+from taxonomy import load_taxonomy, refresh_snapshot
+from app_dataset import build_app_dataset, app_dataset_path, APP_TAXONOMY
+from relatedness import proximity_matrix, relatedness_table, save_proximity, load_proximity, proximity_paths
 EU_iso3  = ["AUT","BEL","BGR","HRV","CYP","CZE","DNK","EST","FIN","FRA","DEU","GRC","HUN","IRL","ITA","LVA","LTU","LUX","MLT","NLD","POL","PRT","ROU","SVK","SVN","ESP","SWE"]
 
-# --- Load BACI data, aggregate exports and fill in ISO3 country codes ---
-
 VERSION = 'V202601'
 YEARS = [2022, 2023, 2024]
 
-# Load and concatenate all years
-frames = []
-for year in YEARS:
-    df = pd.read_csv(f'BACI_HS22_Y{year}_{VERSION}.csv')
-    frames.append(df.groupby(['t', 'i', 'k'], as_index=False).agg({'v': 'sum', 'q': 'sum'}))
-BACI_agg = pd.concat(frames, ignore_index=True)
-
-country_codes = pd.read_csv(f'country_codes_{VERSION}.csv')
-BACI_agg = BACI_agg.merge(country_codes, left_on='i', right_on='country_code')
-data = pd.DataFrame({
-    'time': BACI_agg['t'],
-    'loc': BACI_agg['country_iso3'],
-    'prod': BACI_agg['k'],
-    'val': (BACI_agg['v'] * 1000)
-})
-
-# --- Use ecomplexity to get complexity values and proximity matrix ---
-
-# Calculate complexity
+COMPLEXITY_CACHE = 'cache/complexity'
+MANIFEST_PATH = 'outputs/manifest.json'
+
 trade_cols = {'time':'time', 'loc':'loc', 'prod':'prod', 'val':'val'}
-cdata = ecomplexity(data, trade_cols)
-# Calculate proximity matrix
-prox_df = proximity(data, trade_cols)
+
+# --- Load BACI data, aggregate exports and fill in ISO3 country codes ---
+
+def load_trade_data(year, country_codes, digest=None):
+    # Exporter × product totals — streamed from the CSV only when the cached partition is missing or stale
+    BACI_agg = load_baci_year(year, VERSION, digest=digest)
+    BACI_agg = BACI_agg.merge(country_codes, left_on='i', right_on='country_code')
+    return pd.DataFrame({
+        'time': BACI_agg['t'],
+        'loc': BACI_agg['country_iso3'],
+        'prod': BACI_agg['k'],
+        'val': (BACI_agg['v'] * 1000)
+    })
 
 # --- Add Czech names ---
 
-CzechNames = pd.read_csv('CZ_HS6_codes.csv')
-EnglishNames = pd.read_csv(f'product_codes_HS22_{VERSION}.csv')
-EnglishNames['code'] = pd.to_numeric(EnglishNames['code'], errors="coerce")
-classed_cdata = cdata.merge(CzechNames[['HS6','POPIS']],left_on='prod',right_on='HS6',how='left').drop('HS6',axis=1)
-classed_cdata = classed_cdata.merge(EnglishNames,left_on='prod',right_on='code',how='left').drop('code',axis=1)
-classed_cdata.loc[classed_cdata['POPIS'].isna(), 'POPIS'] = classed_cdata.loc[classed_cdata['POPIS'].isna(), 'description']
+def add_product_names(cdata, CzechNames, EnglishNames):
+    classed_cdata = cdata.merge(CzechNames[['HS6','POPIS']],left_on='prod',right_on='HS6',how='left').drop('HS6',axis=1)
+    classed_cdata = classed_cdata.merge(EnglishNames,left_on='prod',right_on='code',how='left').drop('code',axis=1)
+    classed_cdata.loc[classed_cdata['POPIS'].isna(), 'POPIS'] = classed_cdata.loc[classed_cdata['POPIS'].isna(), 'description']
+    return classed_cdata
 
 # --- Calculate product space values ---
 
-# Function to calculate market concentration
-def calculate_hhi(group):
-    # Calculate market share of each country's export value for the product
-    market_share = group["val"] / group["val"].sum()
-    # Square the market shares and sum them to calculate HHI
-    hhi = (market_share ** 2).sum()
-    return hhi
-
 def get_product_space(cdata):
     # Get EU only data
     EU_data = cdata[cdata['loc'].isin(EU_iso3)]
 
     # Calculate HHI in the world and in the EU
-    hhi = cdata.groupby("prod").apply(calculate_hhi, include_groups=False).reset_index()
-    euhhi = EU_data.groupby("prod").apply(calculate_hhi, include_groups=False).reset_index()
-    hhi.rename(columns={0:'hhi'}, inplace=True)
-    euhhi.rename(columns={0:'euhhi'}, inplace=True)
+    hhi = calculate_hhi(cdata, {'hhi': None, 'euhhi': EU_iso3})
 
     # Calculate World and EU export
     WorldExport = cdata[['prod','val']].groupby('prod').agg('sum').reset_index()
@@ -78,48 +71,65 @@ def get_product_space(cdata):
     ProductSpace = ProductSpace.merge(EUTopExporter,left_on='prod',right_on='prod')
     ProductSpace['EUWorldMarketShare'] = ProductSpace['EUExport']/ProductSpace['WorldExport']
     ProductSpace = ProductSpace.merge(hhi,left_on='prod',right_on='prod')
-    ProductSpace = ProductSpace.merge(euhhi,left_on='prod',right_on='prod')
     return ProductSpace
 
 # --- Calculate relatedness ---
-# Using the OEC formula https://oec.world/en/resources/methods#relatedness
 
-def get_relatedness(country_iso3, year, prox_df, cdata):
-    # Step 1: Filter for the given year
-    prox_filtered = prox_df[prox_df['time'] == year]
-    cdata_filtered = cdata[cdata['time'] == year]
+def get_relatedness(year, cdata):
+    # Relatedness of every country to every product in the year, as a country × product table
+    products, phi = load_proximity(year)
+    return relatedness_table(cdata[cdata['time'] == year], products, phi)
 
-    # Step 2: Filter cdata by the country
-    cdata_filtered = cdata_filtered[cdata_filtered['loc'] == country_iso3]
+# --- Combine all data to give an overview of every country ---
 
-    # Step 3: Merge proximity data (prod_1 and prod_2) with cdata on 'prod_2' = 'prod'
-    merged_df = pd.merge(cdata_filtered, prox_filtered, left_on='prod', right_on='prod_2')
+COUNTRY_TABLE_CACHE = 'cache/country_table'
+# Ranking columns, in output order; ranks are half-integers at most, so float32/int16 hold them exactly
+RANK_COLUMNS = ['PCI_Rank', 'PCI_Percentile', 'relatedness_Rank', 'relatedness_Percentile',
+                'export_Rank', 'export_Percentile']
 
-    # Step 4: Group by HS6 code (prod_1) and calculate relatedness for each group
-    def calculate_relatedness(group):
-        return (group['mcp'] * group['proximity']).sum() / group['proximity'].sum()
+def get_country_table(year, relatedness, ProductSpaceInfo, cdata):
+    # Every country's products for the year, with relatedness and the year's ProductSpaceInfo
+    # (computed once per year, it does not depend on the country)
+    table = cdata[cdata['time'] == year].copy()
 
-    # Step 5: Calculate relatedness for each prod_1
-    relatedness_results = merged_df.groupby('prod_1').apply(calculate_relatedness, include_groups=False)
-    relatedness_df = relatedness_results.reset_index().rename(columns={'prod_1': 'prod', 0: 'relatedness'})
-    return relatedness_df
+    # World ranking of every exporter for each product (rank 1 = top global exporter)
+    table['WorldRank'] = table.groupby('prod')['val'].rank(ascending=False, method='min')
 
-# --- Combine all data to give a country overview ---
+    country_relatedness = relatedness.reset_index().melt(id_vars='loc', var_name='prod', value_name='relatedness')
+    table = table.merge(country_relatedness, on=['loc', 'prod'])
+    table = table.merge(ProductSpaceInfo,left_on='prod',right_on='prod')
 
-def get_country_data(country_iso3, year, prox_df, cdata):
-    # Subset for year and location
-    output = cdata[(cdata['time'] == year) & (cdata['loc'] == country_iso3)]
-
-    # Calculate Relatedness and merge
-    relatedness = get_relatedness(country_iso3, year, prox_df, cdata)
-    output = output.merge(relatedness,left_on='prod',right_on='prod')
+    # Rename columns
+    table = table.rename(columns={'val': 'ExportValue'})
+    return rank_all_countries(table)
+
+def rank_all_countries(table):
+    # Rank products within each country in one vectorized pass over all countries
+    by_country = table.groupby('loc')
+    table['PCI_Rank'] = by_country['pci'].rank(ascending=True).astype('float32')
+    table['PCI_Percentile'] = by_country['pci'].rank(ascending=True, pct=True) * 100
+    table['relatedness_Rank'] = by_country['relatedness'].rank(ascending=True).astype('float32')
+    table['relatedness_Percentile'] = by_country['relatedness'].rank(ascending=True, pct=True) * 100
+    table['export_Rank'] = table['WorldRank'].fillna(0).astype('int16')
+    table['export_Percentile'] = table.groupby('loc')['export_Rank'].rank(ascending=True, pct=True) * 100
+    return table.drop(columns=['WorldRank'])
+
+def country_table_path(year):
+    return os.path.join(COUNTRY_TABLE_CACHE, f'year={year}.parquet')
+
+def save_country_table(year, table):
+    # Sorted by country (stably, keeping product order) so a single country's rows can be read on their own
+    os.makedirs(COUNTRY_TABLE_CACHE, exist_ok=True)
+    table.sort_values('loc', kind='stable').to_parquet(country_table_path(year), index=False,
+                                                       row_group_size=50_000)
 
-    # Merge with ProductSpaceInfo (filter to year so WorldExport is per-year, not summed across all years)
-    ProductSpaceInfo = get_product_space(cdata[cdata['time'] == year])
-    output = output.merge(ProductSpaceInfo,left_on='prod',right_on='prod')
+# --- Calculate for a given country ---
 
-    # Rename columns
-    output = output.rename(columns={'val': 'ExportValue'})
+def get_country_data(country_iso3, year):
+    # A country's output is a filter of the precomputed all-country table
+    output = pd.read_parquet(country_table_path(year), filters=[('loc', '==', country_iso3)])
+    ranks = output[RANK_COLUMNS]
+    output = output.drop(columns=RANK_COLUMNS)
 
     # Add World and EU Market Share
     output[country_iso3+'_WorldMarketShare'] = output['ExportValue']/output['WorldExport']
@@ -127,77 +137,82 @@ def get_country_data(country_iso3, year, prox_df, cdata):
     # If country is in the EU calculate EU Market Share
     if country_iso3 in EU_iso3:
         output[country_iso3+'_EUMarketShare'] = output['ExportValue']/output['EUExport']
-    return output
+    return pd.concat([output, ranks], axis=1)
+
+def country_output_path(country_iso3, year):
+    return f'outputs/{country_iso3}_{year}.csv'
+
+def write_country_output(country_iso3, year):
+    path = country_output_path(country_iso3, year)
+    get_country_data(country_iso3, year).to_csv(path)
+    return path
+
+def write_country_outputs(year, countries, workers):
+    # Workers only filter the saved all-country table and write CSVs
+    if workers <= 1 or len(countries) == 1:
+        paths = [write_country_output(country_iso3, year) for country_iso3 in countries]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(countries))) as pool:
+            paths = list(pool.map(write_country_output, countries, [year] * len(countries)))
+    for path in paths:
+        print(f'Saved {path}')
+
+# --- Decide which years need recomputing ---
+
+def input_fingerprint(year):
+    # Everything a year's outputs depend on; a change in any of these makes the year stale
+    return {
+        'version': VERSION,
+        'baci': baci_digest(year, VERSION),
+        'country_codes': file_sha256(f'country_codes_{VERSION}.csv'),
+        'czech_names': file_sha256('CZ_HS6_codes.csv'),
+        'english_names': file_sha256(f'product_codes_HS22_{VERSION}.csv'),
+    }
+
+def complexity_cache_path(year):
+    return os.path.join(COMPLEXITY_CACHE, f'year={year}.parquet')
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH) as f:
+        return json.load(f)
+
+def save_manifest(manifest):
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+def remove_outdated_outputs(year, entry, written, app_current):
+    # Outputs of an earlier run with other inputs (or an app dataset built with another app taxonomy)
+    # that this run did not rewrite would keep the old numbers
+    outdated = [country_output_path(c, year) for c in entry.get('countries', []) if c not in written]
+    if not app_current:
+        outdated.append(app_dataset_path(year))
+    for path in outdated:
+        if os.path.exists(path):
+            os.remove(path)
+            print(f'Removed outdated {path}')
+
+def is_stale(year, fingerprint, manifest):
+    if manifest.get(str(year), {}).get('inputs') != fingerprint:
+        return True
+    outputs = [complexity_cache_path(year), *proximity_paths(year)]
+    return not all(os.path.exists(path) for path in outputs)
+
+# --- Per-year pipeline ---
+
+def compute_complexity(year, country_codes, digest=None):
+    data = load_trade_data(year, country_codes, digest)
+
+    # Use ecomplexity to get complexity values and proximity matrix (both are computed per year)
+    cdata = ecomplexity(data, trade_cols)
+    # Keep proximity only as a float32 product × product matrix on disk — the long edgelist is dropped right away
+    save_proximity(year, *proximity_matrix(proximity(data, trade_cols)))
+
+    os.makedirs(COMPLEXITY_CACHE, exist_ok=True)
+    cdata.to_parquet(complexity_cache_path(year), index=False)
+    return cdata
 
-# --- Calculate for a given country ---
-
-CZE_by_year = {}
-for year in YEARS:
-    CZE = get_country_data('CZE', year, prox_df, classed_cdata)
-
-    CZE['PCI_Rank'] = CZE['pci'].rank(ascending=True)
-    CZE['PCI_Percentile'] = CZE['pci'].rank(ascending=True, pct=True) * 100
-    CZE['relatedness_Rank'] = CZE['relatedness'].rank(ascending=True)
-    CZE['relatedness_Percentile'] = CZE['relatedness'].rank(ascending=True, pct=True) * 100
-    # Compute CZE's world ranking for each product (rank 1 = top global exporter)
-    year_all = cdata[cdata['time'] == year][['prod', 'loc', 'val']]
-    world_ranks = year_all.groupby('prod')['val'].rank(ascending=False, method='min')
-    cze_world_rank = year_all.assign(WorldRank=world_ranks).query("loc == 'CZE'")[['prod', 'WorldRank']]
-    CZE = CZE.merge(cze_world_rank, on='prod', how='left')
-    CZE['export_Rank'] = CZE['WorldRank'].fillna(0).astype(int)
-    CZE = CZE.drop(columns=['WorldRank'])
-    CZE['export_Percentile'] = CZE['export_Rank'].rank(ascending=True, pct=True) * 100
-
-    CZE.to_csv(f'outputs/CZE_{year}.csv')
-    CZE_by_year[year] = CZE
-    print(f'Saved CZE_{year}.csv')
-
-# Keep the latest year as CZE for downstream cells (Green Products etc.)
-CZE = CZE_by_year[YEARS[-1]]
-
-# --- Get Green Products ---
-
-url = 'https://docs.google.com/spreadsheets/d/1M4_XVEXApUbnklbRwX1dqDVYIDStX4Uk/pub?gid=884468600&single=true&output=csv'
-taxonomy = pd.read_csv(url)
-GreenProducts = taxonomy.merge(CZE,how='left',left_on='HS_ID',right_on='prod')
-# Calculate 2030 export value
-GreenProducts['CountryExport2030'] = GreenProducts['ExportValue'] * (1 + GreenProducts['CAGR_2022_30_FORECAST']) ** 8
-GreenProducts['EUExport2030'] = GreenProducts['EUExport'] * (1 + GreenProducts['CAGR_2022_30_FORECAST']) ** 8
-
-# Calculate Total Export Value from 2025 to 2030
-# We calculate for each year and sum up
-GreenProducts['CountryExport_25_30'] = sum(GreenProducts['ExportValue'] * (1 + GreenProducts['CAGR_2022_30_FORECAST']) ** i for i in range(3, 9))
-GreenProducts['EUExport_25_30'] = sum(GreenProducts['EUExport'] * (1 + GreenProducts['CAGR_2022_30_FORECAST']) ** i for i in range(3, 9))
-
-GreenProducts.rename(columns={'ExportValue': 'CZ Export 2022 CZK',
-                              'pci': 'Komplexita výrobku 2022',
-                               'relatedness': 'Příbuznost CZ 2022',
-                               'WorldExport':'Světový export 2022 CZK',
-                               'EUExport':'EU Export 2022 CZK',
-                               'EUWorldMarketShare':'EU Světový Podíl 2022 %',
-                               'euhhi':'Koncentrace evropského exportu 2022',
-                               'hhi':'Koncentrace světového trhu 2022',
-                               'CZE_WorldMarketShare':'CZ Světový Podíl 2022 %',
-                               'CZE_EUMarketShare':'CZ-EU Podíl 2022 %',
-                               'rca':'Výhoda CZ 2022',
-                               'EUTopExporter':'EU Největší Exportér 2022',
-                               'POPIS':'Název Produktu',
-                               'CountryExport2030':'CZ 2030 Export CZK',
-                               'EUExport2030':'EU 2030 Export CZK',
-                               'CountryExport_25_30':'CZ Celkový Export 25-30 CZK',
-                               'EUExport_25_30':'EU Celkový Export 25-30 CZK',
-                               'CAGR_2022_30_FORECAST':'CAGR 2022-2030 Předpověď'
-                               }).to_csv('GreenComplexity_CZE_2022.csv')
-
-# --- Get Full Product Database ---
-
-products = get_product_space(classed_cdata)
-products = products.merge(CzechNames[['HS6','POPIS']],left_on='prod',right_on='HS6',how='left').drop('HS6',axis=1)
-products = products.merge(EnglishNames,left_on='prod',right_on='code',how='left').drop('code',axis=1)
-products.to_csv('HS22_Products.csv',encoding='utf-8-sig')
-
-import pandas as pd
-products = pd.read_csv('HS22_Products.csv')
 # Function to insert <br> after 6 words
 def insert_br(text):
     if not isinstance(text, str):  # Check if the entry is not a string
@@ -212,5 +227,129 @@ def insert_br(text):
 
     return ''.join(new_text).rstrip('<br>')  # Join everything, remove last <br>
 
-products['POPIS'] = products['POPIS'].apply(insert_br)
-products.to_csv('HS22_Products_br.csv',encoding='utf-8-sig')
+def main():
+    parser = argparse.ArgumentParser(description='Compute complexity outputs from BACI trade data.')
+    parser.add_argument('--years', type=int, nargs='+', default=[],
+                        help='recompute these years even if their inputs are unchanged')
+    parser.add_argument('--full', action='store_true', help='recompute every year in YEARS')
+    parser.add_argument('--countries', nargs='+', default=['CZE'], help='ISO3 codes to write outputs for')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='processes used to write country outputs')
+    parser.add_argument('--refresh-taxonomy', action='store_true',
+                        help='download a new snapshot of the green-products taxonomy sheet first')
+    args = parser.parse_args()
+    unknown = sorted(set(args.years) - set(YEARS))
+    if unknown:
+        parser.error(f'years {unknown} are not in YEARS {YEARS}')
+
+    # Resolve the taxonomy first, so a missing file fails before the expensive per-year work
+    taxonomy, taxonomy_source = load_taxonomy(refresh_snapshot() if args.refresh_taxonomy else None)
+    print(f"Using taxonomy {taxonomy_source['path']} (sha256 {taxonomy_source['sha256'][:12]})")
+
+    country_codes = pd.read_csv(f'country_codes_{VERSION}.csv')
+    countries = list(dict.fromkeys(code.upper() for code in args.countries))
+    unknown = sorted(set(countries) - set(country_codes['country_iso3']))
+    if unknown:
+        parser.error(f'unknown ISO3 codes {unknown}')
+    CzechNames = pd.read_csv('CZ_HS6_codes.csv')
+    EnglishNames = pd.read_csv(f'product_codes_HS22_{VERSION}.csv')
+    EnglishNames['code'] = pd.to_numeric(EnglishNames['code'], errors="coerce")
+
+    manifest = load_manifest()
+    fingerprints = {year: input_fingerprint(year) for year in YEARS}
+    stale = [year for year in YEARS
+             if args.full or year in args.years or is_stale(year, fingerprints[year], manifest)]
+    print(f'Recomputing years: {stale or "none"}')
+    # The app datasets also depend on the app taxonomy; a change rebuilds them for every year
+    app_taxonomy = file_sha256(APP_TAXONOMY)
+
+    cdata_by_year = {}
+    for year in YEARS:
+        # Outputs recorded for this year; they are current only while the year's inputs are unchanged
+        entry = manifest.get(str(year), {})
+        current = entry.get('inputs') == fingerprints[year]
+        written = set(entry.get('countries', [])) if current else set()
+        if year in stale:
+            cdata_by_year[year] = compute_complexity(year, country_codes, fingerprints[year]['baci'])
+            missing = countries
+        else:
+            # Inputs unchanged — reuse the previous run's outputs and only add countries not written yet
+            cdata_by_year[year] = pd.read_parquet(complexity_cache_path(year))
+            missing = [c for c in countries if c not in written or not os.path.exists(country_output_path(c, year))]
+        if missing and (year in stale or not os.path.exists(country_table_path(year))):
+            relatedness = get_relatedness(year, cdata_by_year[year])
+            # Product space (world/EU export, top EU exporter, HHI) for this year, shared by all countries
+            ProductSpaceInfo = get_product_space(cdata_by_year[year])
+            classed_cdata = add_product_names(cdata_by_year[year], CzechNames, EnglishNames)
+            save_country_table(year, get_country_table(year, relatedness, ProductSpaceInfo, classed_cdata))
+        if missing:
+            write_country_outputs(year, missing, args.workers)
+        written.update(missing)
+        # The app reads its own pre-joined Parquet of the CZE output (see app_dataset.py)
+        app_current = (current and entry.get('app_taxonomy') == app_taxonomy
+                       and os.path.exists(app_dataset_path(year)))
+        if 'CZE' in written and ('CZE' in missing or not app_current):
+            print(f'Saved {build_app_dataset(year)}')
+            app_current = True
+        remove_outdated_outputs(year, entry, written, app_current)
+        # Recorded only now, so an interrupted run recomputes the year instead of trusting half-written outputs
+        manifest[str(year)] = {'inputs': fingerprints[year], 'countries': sorted(written),
+                               'app_taxonomy': app_taxonomy if app_current else None}
+        save_manifest(manifest)
+    cdata = pd.concat(cdata_by_year.values(), ignore_index=True)
+
+    # The green products and product database below are Czech-specific and use the latest CZE output
+    latest_cze = country_output_path('CZE', YEARS[-1])
+    if not os.path.exists(latest_cze):
+        print(f'{latest_cze} not found, skipping green products (include CZE in --countries)')
+        return
+    CZE = pd.read_csv(latest_cze, index_col=0)
+
+    # --- Get Green Products ---
+
+    manifest['taxonomy'] = taxonomy_source
+    save_manifest(manifest)
+    GreenProducts = taxonomy.merge(CZE,how='left',left_on='HS_ID',right_on='prod')
+    # Calculate 2030 export value
+    GreenProducts['CountryExport2030'] = GreenProducts['ExportValue'] * (1 + GreenProducts['CAGR_2022_30_FORECAST']) ** 8
+    GreenProducts['EUExport2030'] = GreenProducts['EUExport'] * (1 + GreenProducts['CAGR_2022_30_FORECAST']) ** 8
+
+    # Calculate Total Export Value from 2025 to 2030
+    # We calculate for each year and sum up
+    GreenProducts['CountryExport_25_30'] = sum(GreenProducts['ExportValue'] * (1 + GreenProducts['CAGR_2022_30_FORECAST']) ** i for i in range(3, 9))
+    GreenProducts['EUExport_25_30'] = sum(GreenProducts['EUExport'] * (1 + GreenProducts['CAGR_2022_30_FORECAST']) ** i for i in range(3, 9))
+
+    GreenProducts.rename(columns={'ExportValue': 'CZ Export 2022 CZK',
+                                  'pci': 'Komplexita výrobku 2022',
+                                   'relatedness': 'Příbuznost CZ 2022',
+                                   'WorldExport':'Světový export 2022 CZK',
+                                   'EUExport':'EU Export 2022 CZK',
+                                   'EUWorldMarketShare':'EU Světový Podíl 2022 %',
+                                   'euhhi':'Koncentrace evropského exportu 2022',
+                                   'hhi':'Koncentrace světového trhu 2022',
+                                   'CZE_WorldMarketShare':'CZ Světový Podíl 2022 %',
+                                   'CZE_EUMarketShare':'CZ-EU Podíl 2022 %',
+                                   'rca':'Výhoda CZ 2022',
+                                   'EUTopExporter':'EU Největší Exportér 2022',
+                                   'POPIS':'Název Produktu',
+                                   'CountryExport2030':'CZ 2030 Export CZK',
+                                   'EUExport2030':'EU 2030 Export CZK',
+                                   'CountryExport_25_30':'CZ Celkový Export 25-30 CZK',
+                                   'EUExport_25_30':'EU Celkový Export 25-30 CZK',
+                                   'CAGR_2022_30_FORECAST':'CAGR 2022-2030 Předpověď'
+                                   }).to_csv('GreenComplexity_CZE_2022.csv')
+
+    # --- Get Full Product Database ---
+
+    products = get_product_space(cdata)
+    products = products.merge(CzechNames[['HS6','POPIS']],left_on='prod',right_on='HS6',how='left').drop('HS6',axis=1)
+    products = products.merge(EnglishNames,left_on='prod',right_on='code',how='left').drop('code',axis=1)
+    products.to_csv('HS22_Products.csv',encoding='utf-8-sig')
+
+    products = pd.read_csv('HS22_Products.csv')
+    products['POPIS'] = products['POPIS'].apply(insert_br)
+    products.to_csv('HS22_Products_br.csv',encoding='utf-8-sig')
+
+
+if __name__ == '__main__':
+    main()
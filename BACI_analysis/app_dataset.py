@@ -0,0 +1,61 @@
+# Builds the per-year dataset the Streamlit app reads: a country output joined with the app taxonomy,
+# filtered to the green products (Included == "IN"), pruned to the plotted columns and written as Parquet.
+# Usage: python app_dataset.py [2022 2023 ...] (run from the BACI_analysis directory; default: every CZE_{year}.csv)
+import glob
+import json
+import os
+import re
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+APP_TAXONOMY = 'outputs/PlnaDatabaze3.0.csv'
+APP_DATA_DIR = 'outputs/app'
+# Key of the Parquet schema metadata holding values that do not fit a row (e.g. the country's total export)
+METADATA_KEY = b'mapa'
+
+TAXONOMY_COLUMNS = ['HS_ID', 'Skupina', 'Podskupina', 'Kategorie', 'CZ_Nazev', 'Barva Skupina', 'Barva Kategorie']
+# Country output columns used by the app; the country-specific market share column is stored as WorldMarketShare
+METRIC_COLUMNS = ['ExportValue', 'export_Rank', 'pci', 'relatedness', 'PCI_Percentile', 'relatedness_Percentile',
+                  'WorldExport', 'WorldMarketShare', 'hhi', 'euhhi', 'rca', 'EUTopExporter']
+CATEGORICAL_COLUMNS = ['Skupina', 'Podskupina', 'Kategorie', 'Barva Skupina', 'Barva Kategorie', 'EUTopExporter']
+
+
+def app_dataset_path(year, country_iso3='CZE', directory=APP_DATA_DIR):
+    return os.path.join(directory, f'{country_iso3}_{year}.parquet')
+
+
+def build_app_dataset(year, country_iso3='CZE', output_dir='outputs', taxonomy_path=APP_TAXONOMY):
+    """Write the app's Parquet for one country-year from outputs/{ISO3}_{year}.csv and return its path."""
+    taxonomy = pd.read_csv(taxonomy_path, usecols=TAXONOMY_COLUMNS + ['Included'])
+    share_column = f'{country_iso3}_WorldMarketShare'
+    columns = ['prod'] + [share_column if c == 'WorldMarketShare' else c for c in METRIC_COLUMNS]
+    country = pd.read_csv(os.path.join(output_dir, f'{country_iso3}_{year}.csv'), usecols=columns)
+    country = country.rename(columns={share_column: 'WorldMarketShare'})
+
+    df = taxonomy[taxonomy['Included'] == 'IN'][TAXONOMY_COLUMNS]
+    df = df.merge(country[['prod'] + METRIC_COLUMNS], how='left', left_on='HS_ID', right_on='prod')
+    df = df.drop(columns='prod').reset_index(drop=True)
+    df[CATEGORICAL_COLUMNS] = df[CATEGORICAL_COLUMNS].astype('category')
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = {'year': str(year), 'country': country_iso3,
+                'total_export': float(country['ExportValue'].sum())}
+    table = table.replace_schema_metadata({**table.schema.metadata, METADATA_KEY: json.dumps(metadata)})
+    path = app_dataset_path(year, country_iso3, os.path.join(output_dir, 'app'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(table, path)
+    return path
+
+
+def available_years(country_iso3='CZE', output_dir='outputs'):
+    pattern = re.compile(rf'{country_iso3}_(\d{{4}})\.csv$')
+    paths = glob.glob(os.path.join(output_dir, f'{country_iso3}_*.csv'))
+    return sorted(int(m.group(1)) for m in map(pattern.search, paths) if m)
+
+
+if __name__ == '__main__':
+    for year in [int(y) for y in sys.argv[1:]] or available_years():
+        print(f'Saved {build_app_dataset(year)}')
@@ -0,0 +1,109 @@
+# Streaming BACI ingestion — aggregates exporter × product totals without holding the bilateral table in memory.
+# Aggregates are cached as Parquet (needs pyarrow) under CACHE_DIR, partitioned by BACI version and year.
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+# Only the columns needed for exporter × product totals (the importer 'j' is never read)
+BACI_COLUMNS = ['t', 'i', 'k', 'v', 'q']
+# Narrow dtypes: country codes fit in int16, HS6 codes in int32; values stay float64 so sums match a full read
+BACI_DTYPES = {'t': 'int16', 'i': 'int16', 'k': 'int32', 'v': 'float64', 'q': 'float64'}
+AGG_KEYS = ['t', 'i', 'k']
+# Rows per chunk — ~2M rows is roughly 50 MB with the dtypes above
+CHUNKSIZE = 2_000_000
+CACHE_DIR = 'cache/baci_agg'
+
+
+def read_baci_year(path, chunksize=CHUNKSIZE):
+    """Read one BACI_HS22_Y{year} file in chunks and return exporter × product sums of 'v' and 'q'.
+
+    Each chunk is reduced to (t, i, k) totals and folded into the running aggregate,
+    so peak memory is one chunk plus the aggregate (at most countries × products rows).
+    """
+    reader = pd.read_csv(path, usecols=BACI_COLUMNS, dtype=BACI_DTYPES, chunksize=chunksize,
+                         skipinitialspace=True, na_values=['NA'])
+    agg = None
+    for chunk in reader:
+        part = chunk.groupby(AGG_KEYS, as_index=False, sort=False).agg({'v': 'sum', 'q': 'sum'})
+        if agg is not None:
+            part = pd.concat([agg, part], ignore_index=True).groupby(AGG_KEYS, as_index=False, sort=False).sum()
+        agg = part
+    if agg is None:
+        return pd.DataFrame({col: pd.Series(dtype=BACI_DTYPES[col]) for col in BACI_COLUMNS})
+    return agg.sort_values(AGG_KEYS, ignore_index=True)
+
+
+def file_sha256(path, blocksize=1 << 20):
+    """SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(blocksize), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def baci_path(year, version):
+    return f'BACI_HS22_Y{year}_{version}.csv'
+
+
+def partition_dir(year, version, cache_dir=CACHE_DIR):
+    # Hive-style layout so pd.read_parquet(cache_dir) can also read all partitions at once;
+    # files starting with '_' (the _source.json sidecar) are skipped by pyarrow's dataset discovery
+    return os.path.join(cache_dir, f'version={version}', f'year={year}')
+
+
+def source_digest(path, meta=None):
+    """Content hash of a source CSV, reusing the hash stored in `meta` when size and mtime are unchanged."""
+    stat = os.stat(path)
+    if meta and meta.get('size') == stat.st_size and meta.get('mtime_ns') == stat.st_mtime_ns:
+        return meta['sha256']
+    return file_sha256(path)
+
+
+def read_partition_meta(year, version, cache_dir=CACHE_DIR):
+    """The _source.json recorded for a cached partition, or None if the partition is missing."""
+    partition = partition_dir(year, version, cache_dir)
+    meta_path = os.path.join(partition, '_source.json')
+    if not (os.path.exists(meta_path) and os.path.exists(os.path.join(partition, 'part.parquet'))):
+        return None
+    with open(meta_path) as f:
+        return json.load(f)
+
+
+def baci_digest(year, version, cache_dir=CACHE_DIR):
+    """Content hash of a year's BACI CSV without aggregating it (cheap when the cached partition is current)."""
+    return source_digest(baci_path(year, version), read_partition_meta(year, version, cache_dir))
+
+
+def load_baci_year(year, version, cache_dir=CACHE_DIR, chunksize=CHUNKSIZE, digest=None):
+    """Exporter × product totals for one year, served from the Parquet cache when the source CSV is unchanged.
+
+    A partition is rebuilt only if its source file hash differs from the one recorded next to it.
+    Pass `digest` when the source hash is already known to avoid hashing the file twice.
+    """
+    source = baci_path(year, version)
+    partition = partition_dir(year, version, cache_dir)
+    data_path = os.path.join(partition, 'part.parquet')
+    meta_path = os.path.join(partition, '_source.json')
+
+    meta = read_partition_meta(year, version, cache_dir)
+    if digest is None:
+        digest = source_digest(source, meta)
+    if meta is not None and meta['sha256'] == digest:
+        agg = pd.read_parquet(data_path)
+    else:
+        print(f'Aggregating {source}')
+        agg = read_baci_year(source, chunksize=chunksize)
+        os.makedirs(partition, exist_ok=True)
+        # Write to a temporary file first so an interrupted run never leaves a half-written partition
+        agg.to_parquet(data_path + '.tmp', index=False)
+        os.replace(data_path + '.tmp', data_path)
+
+    # Refresh size/mtime too, so a touched but identical file is not re-hashed on every run
+    stat = os.stat(source)
+    with open(meta_path, 'w') as f:
+        json.dump({'source': source, 'sha256': digest, 'size': stat.st_size,
+                   'mtime_ns': stat.st_mtime_ns, 'rows': len(agg)}, f, indent=2)
+    return agg
@@ -0,0 +1,81 @@
+# Relatedness for all countries at once, from a product × product proximity matrix.
+# Using the OEC formula https://oec.world/en/resources/methods#relatedness
+# Proximity matrices are stored per year as float32 .npy files (with a CSV of their product codes)
+# so the pipeline and the app can memory-map them instead of keeping the long edgelist around.
+import os
+
+import numpy as np
+import pandas as pd
+
+PROXIMITY_DIR = 'outputs/proximity'
+
+
+def proximity_matrix(prox_df):
+    """Square proximity matrix for one year of the long ecomplexity output (prod_1, prod_2, proximity).
+
+    Returns (products, phi) where phi[a, b] is the proximity between products[a] and products[b].
+    ecomplexity emits the pairs row-major over sorted products, so the values are reshaped in place
+    when that holds and pivoted otherwise.
+    """
+    n = int(round(np.sqrt(len(prox_df))))
+    prod_1 = prox_df['prod_1'].to_numpy()
+    prod_2 = prox_df['prod_2'].to_numpy()
+    products = prod_2[:n]
+    if n * n == len(prox_df) and np.array_equal(prod_1[::n], products) and np.array_equal(prod_2[n:2 * n], products):
+        return products, prox_df['proximity'].to_numpy(dtype=np.float64).reshape(n, n)
+    phi = prox_df.pivot(index='prod_1', columns='prod_2', values='proximity')
+    phi = phi.reindex(columns=phi.index)
+    return phi.index.to_numpy(), phi.to_numpy(dtype=np.float64)
+
+
+def mcp_matrix(cdata, products):
+    """Country × product Mcp (0/1) for one year, columns aligned to `products`."""
+    # max() keeps the computed Mcp when a location has duplicate rows with a missing one
+    mcp = cdata.groupby(['loc', 'prod'])['mcp'].max().unstack('prod')
+    return mcp.reindex(columns=products).fillna(0)
+
+
+def relatedness_table(cdata, products, phi):
+    """Relatedness of every country to every product in one matrix product.
+
+    relatedness[c, p] = Σ_p' M[c, p'] · φ[p, p'] / Σ_p' φ[p, p']
+    Missing proximities count as 0, like the skipped NaNs of a pandas sum.
+    Returns a country × product DataFrame.
+    """
+    mcp = mcp_matrix(cdata, products)
+    density = _density(mcp.to_numpy(dtype=np.float64), phi)
+    return pd.DataFrame(density, index=mcp.index, columns=pd.Index(products, name='prod'))
+
+
+def _density(mcp, phi, block_rows=1024):
+    # Walk phi in row blocks, so a float32 memory map is upcast to float64 one block at a time
+    numerator = np.empty(mcp.shape[:-1] + (phi.shape[0],))
+    denominator = np.empty(phi.shape[0])
+    for start in range(0, phi.shape[0], block_rows):
+        block = np.nan_to_num(np.asarray(phi[start:start + block_rows], dtype=np.float64))
+        numerator[..., start:start + block_rows] = mcp @ block.T
+        denominator[start:start + block_rows] = block.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return numerator / denominator
+
+
+# --- Compact proximity storage ---
+
+def proximity_paths(year, directory=PROXIMITY_DIR):
+    return (os.path.join(directory, f'proximity_{year}.npy'),
+            os.path.join(directory, f'proximity_{year}_products.csv'))
+
+
+def save_proximity(year, products, phi, directory=PROXIMITY_DIR):
+    """Write a year's proximity matrix as float32 .npy plus a sidecar CSV of its product codes."""
+    matrix_path, products_path = proximity_paths(year, directory)
+    os.makedirs(directory, exist_ok=True)
+    np.save(matrix_path, np.asarray(phi, dtype=np.float32))
+    pd.DataFrame({'prod': products}).to_csv(products_path, index=False)
+
+
+def load_proximity(year, directory=PROXIMITY_DIR, mmap_mode='r'):
+    """(products, phi) for a year; phi is memory-mapped, so only the pages that are read get loaded."""
+    matrix_path, products_path = proximity_paths(year, directory)
+    products = pd.read_csv(products_path)['prod'].to_numpy()
+    return products, np.load(matrix_path, mmap_mode=mmap_mode)
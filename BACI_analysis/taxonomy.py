@@ -0,0 +1,62 @@
+# Green-products taxonomy (HS_ID → CAGR forecast etc.) from a local, checksummed file instead of a live Google Sheet.
+# The versioned file TAXONOMY_PATH is used when present; otherwise the newest snapshot in SNAPSHOT_DIR.
+# Snapshots are only downloaded on request (python ECIPCI.py --refresh-taxonomy).
+import glob
+import os
+import urllib.request
+from datetime import date
+
+import pandas as pd
+from baci_ingest import file_sha256
+
+TAXONOMY_URL = 'https://docs.google.com/spreadsheets/d/1M4_XVEXApUbnklbRwX1dqDVYIDStX4Uk/pub?gid=884468600&single=true&output=csv'
+TAXONOMY_PATH = 'taxonomy/green_taxonomy.csv'
+SNAPSHOT_DIR = 'taxonomy/snapshots'
+CACHE_DIR = 'cache/taxonomy'
+# Columns the pipeline relies on, with the types they are parsed to
+TAXONOMY_DTYPES = {'HS_ID': 'Int64', 'CAGR_2022_30_FORECAST': 'float64'}
+
+
+def refresh_snapshot(url=TAXONOMY_URL, snapshot_dir=SNAPSHOT_DIR):
+    """Download the published sheet to SNAPSHOT_DIR/green_taxonomy_{YYYYMMDD}.csv and return its path."""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    path = os.path.join(snapshot_dir, f'green_taxonomy_{date.today():%Y%m%d}.csv')
+    with urllib.request.urlopen(url, timeout=60) as response:
+        content = response.read()
+    with open(path + '.tmp', 'wb') as f:
+        f.write(content)
+    os.replace(path + '.tmp', path)
+    print(f'Saved taxonomy snapshot {path}')
+    return path
+
+
+def resolve_taxonomy_path(path=TAXONOMY_PATH, snapshot_dir=SNAPSHOT_DIR):
+    """The versioned taxonomy file, or the newest snapshot if it does not exist."""
+    if os.path.exists(path):
+        return path
+    # Snapshot names carry the date, so the lexicographically last one is the newest
+    snapshots = sorted(glob.glob(os.path.join(snapshot_dir, 'green_taxonomy_*.csv')))
+    if snapshots:
+        return snapshots[-1]
+    raise FileNotFoundError(f'No taxonomy at {path} and no snapshot in {snapshot_dir}; '
+                            'run python ECIPCI.py --refresh-taxonomy to download one')
+
+
+def load_taxonomy(path=None, cache_dir=CACHE_DIR):
+    """Parsed, typed taxonomy and its {'path', 'sha256'}; the parsed frame is cached as Parquet by content hash."""
+    path = path or resolve_taxonomy_path()
+    digest = file_sha256(path)
+    cache_path = os.path.join(cache_dir, f'{digest}.parquet')
+    if os.path.exists(cache_path):
+        taxonomy = pd.read_parquet(cache_path)
+    else:
+        taxonomy = pd.read_csv(path)
+        missing = sorted(set(TAXONOMY_DTYPES) - set(taxonomy.columns))
+        if missing:
+            raise ValueError(f'{path} is missing taxonomy columns {missing}')
+        for column in TAXONOMY_DTYPES:
+            taxonomy[column] = pd.to_numeric(taxonomy[column], errors='coerce')
+        taxonomy = taxonomy.astype(TAXONOMY_DTYPES)
+        os.makedirs(cache_dir, exist_ok=True)
+        taxonomy.to_parquet(cache_path, index=False)
+    return taxonomy, {'path': path, 'sha256': digest}
@@ -1,10 +1,11 @@
 import streamlit as st
-import pandas as pd
 
-from mapatools.chartjsbubble import chartjs_plot
-from mapatools.highchartpolararea import chart_highcharts_variable_pie
-from mapatools.variable_names import get_plot_and_hover_display_names, get_hover_data
-import streamlit.components.v1 as components
+from mapatools.appdata import USDtoCZKdefault, year_registry
+from mapatools.filtering import filter_cache
+from mapatools.cache import render_cache
+from mapatools.chartjsbubble import bubble_points, bubble_chart
+from mapatools.highchartpolararea import chart_highcharts_variable_pie, export_by_group
+from mapatools.variable_names import plot_columns, hover_columns, display_name, display_names, get_hover_data, get_plot_decimals
 from mapatools.visualsetup import load_visual_identity
 
 st.set_page_config(
@@ -19,79 +20,31 @@ col1.subheader("")
 col2.subheader("")
 col2.subheader("Nastavení grafu")
 
+# Years come from the dataset files; each is loaded only when a view needs it
+data = year_registry()
 # Sidebar: Year selection
-year = col2.radio("Rok", ["2022", "2023", "2024"], index=2,horizontal=True)
+year = col2.radio("Rok", data.years, index=len(data) - 1, horizontal=True)
 # growth_pair = col2.radio("Růst", ["2023/2024", "2022/2023", "2022/2024"], index=0, horizontal=True)
 # growth_from, growth_to = growth_pair.split("/")
 growth_from, growth_to = "2022", "2024"  # fixed to 2-year comparison
 topsubcol2 = col2.container()
-def USDtoCZKdefault(year):
-    if year == "2022":
-        return 23.360
-    elif year == "2023":
-        return 22.21
-    elif year == "2024":
-        return 23.208
-
-@st.cache_resource
-def load_data(datayear):
-    USD_to_czk = USDtoCZKdefault(datayear)
-    taxonomy = pd.read_csv("BACI_analysis/outputs/PlnaDatabaze3.0.csv")
-    CZE = pd.read_csv('BACI_analysis/outputs/CZE_' + datayear + '.csv')
-    GreenProducts = taxonomy.merge(CZE, how='left', left_on='HS_ID', right_on='prod')
-       
-    df = GreenProducts.rename(columns={
-        'ExportValue': 'Český export ' + datayear + ' CZK',
-        'export_Rank': 'Pořadí Česka na světovém trhu ' + datayear,
-        'pci': 'Komplexita výrobku (unikátnost) ' + datayear,
-        'relatedness': 'Příbuznost CZ ' + datayear,
-        'PCI_Rank': 'Žebříček komplexity ' + datayear,
-        'PCI_Percentile': 'Percentil komplexity ' + datayear,
-        'relatedness_Rank': 'Žebříček příbuznosti' + datayear,
-        'relatedness_Percentile': 'Percentil příbuznosti ' + datayear,
-        'WorldExport': 'Velikost světového trhu ' + datayear + ' CZK',
-        'EUWorldMarketShare': 'EU Světový Podíl ' + datayear + ' %',
-        'euhhi': 'Koncentrace evropského exportu ' + datayear,
-        'hhi': 'Koncentrace světového trhu ' + datayear,
-        'CZE_WorldMarketShare': 'Podíl Česka na světovém trhu ' + datayear + ' %',
-        'CZE_EUMarketShare': 'CZ-EU Podíl ' + datayear + ' %',
-        'rca': 'RCA ' + datayear,
-        'EUTopExporter': 'EU Největší Exportér ' + datayear,
-        'CZ_Nazev': 'Název',
-    })
-    df = df[df.Included == "IN"]
-    df['CZ-EU Podíl ' + datayear + ' %'] = 100 * df['CZ-EU Podíl ' + datayear + ' %']
-    df['EU Světový Podíl ' + datayear + ' %'] = 100 * df['EU Světový Podíl ' + datayear + ' %']
-    df['Podíl Česka na světovém trhu ' + datayear + ' %'] = 100 * df['Podíl Česka na světovém trhu ' + datayear + ' %']
-    df['Český export ' + datayear + ' USD'] = df['Český export ' + datayear + ' CZK']
-    df['Český export ' + datayear + ' CZK'] = USD_to_czk * df['Český export ' + datayear + ' CZK']
-    df['Velikost světového trhu ' + datayear + ' USD'] = df['Velikost světového trhu ' + datayear + ' CZK']
-    df['Velikost světového trhu ' + datayear + ' CZK'] = USD_to_czk * df['Velikost světového trhu ' + datayear + ' CZK']
-    df['Kód výrobku HS6'] = df['HS_ID'].astype(str)
-    df['HS_Lookup'] = df['Kód výrobku HS6'] + " - " + df['Název']
-    total_cz_export = USD_to_czk * CZE['ExportValue'].sum()
-    total_cz_green_export = df['Český export ' + datayear + ' CZK'].sum()
-    return df, total_cz_export, total_cz_green_export
-
-# Define the default year_placeholder and get plotting lists
+# Widgets list data columns and show their display names with a blank year_placeholder
 year_placeholder = " ‎"
-plot_display_names, hover_display_data = get_plot_and_hover_display_names(year_placeholder)
+def label(column):
+    return display_name(column, year_placeholder)
 
 # Sidebar selection boxes using display names
-x_axis = col2.selectbox("Vyber osu X:", plot_display_names, index=0)
-y_axis = col2.selectbox("Vyber osu Y:", plot_display_names, index=1)
-markersize = col2.selectbox("Velikost dle:", plot_display_names, index=4)
-
-# Load datasets for all years
-df_2022, cz_export_22, cz_green_export_22 = load_data("2022")
-df_2023, cz_export_23, cz_green_export_23 = load_data("2023")
-df_2024, cz_export_24, cz_green_export_24 = load_data("2024")
-df_by_year = {"2022": (df_2022, cz_export_22, cz_green_export_22),
-              "2023": (df_2023, cz_export_23, cz_green_export_23),
-              "2024": (df_2024, cz_export_24, cz_green_export_24)}
-df, cz_total_export, cz_total_green_export = df_by_year[year]
-df_prev, cz_export_prev, cz_green_export_prev = df_by_year[growth_from]
-df_curr, cz_export_curr, cz_green_export_curr = df_by_year[growth_to]
+x_axis = col2.selectbox("Vyber osu X:", plot_columns, index=0, format_func=label)
+y_axis = col2.selectbox("Vyber osu Y:", plot_columns, index=1, format_func=label)
+markersize = col2.selectbox("Velikost dle:", plot_columns, index=4, format_func=label)
+
+# Load only the years of the selected view and the growth comparison
+data.load([year, growth_from, growth_to])
+cz_total_export = data.total_export[year]
+cz_export_prev = data.total_export[growth_from]
+cz_export_curr = data.total_export[growth_to]
+cz_green_export_prev = data[growth_from]['ExportValueCZK'].sum()
+cz_green_export_curr = data[growth_to]['ExportValueCZK'].sum()
 
 # Initialize the session state for filtering by groups
 if 'filtrovat_dle_skupin' not in st.session_state:
@@ -106,57 +59,16 @@ with col2:
 if st.session_state.filtrovat_dle_skupin:
     col2.markdown("**Aktuální zobrazení:** 🧩 Jednotlivé skupiny")
     color = 'Kategorie'
-    # Use the current year's dataframe for group options.
-    cur_df = df_by_year[year][0]
-    skupiny = cur_df['Skupina'].unique()
+    skupiny = list(data.products['Skupina'].unique())
     Skupina = col2.segmented_control('Skupina', skupiny, default=skupiny[5])
 else:
     col2.markdown("**Aktuální zobrazení:** ✅ Všechny zelené produkty")
     color = 'Skupina'
 
-# Define the filtering function
-def apply_filters(df, year_str, x_axis, y_axis, color, markersize):
-    filtered = df.copy()
-
-    # If filtering by groups is active, assume Skupina is defined already.
-    if st.session_state.filtrovat_dle_skupin:
-        filtered = filtered[filtered['Skupina'].isin([Skupina])]
-
-    for filter in st.session_state.filters:
-        if filter['column'] is not None and filter['range'] is not None:
-            colname = filter['column'].replace(year_placeholder, year_str)
-            filtered = filtered[
-                (filtered[colname] >= filter['range'][0]) &
-                (filtered[colname] <= filter['range'][1])
-            ]
-
-    # Replace negative marker sizes with 0
-    col_ms = markersize.replace(year_placeholder, year_str)
-    filtered[col_ms] = filtered[col_ms].clip(lower=0)
-
-    # Drop rows with missing values for plotting columns
-    filtered = filtered.dropna(subset=[
-        x_axis.replace(year_placeholder, year_str),
-        y_axis.replace(year_placeholder, year_str),
-        color,
-        col_ms
-    ])
-
-    return filtered
-
 # Ensure session state filters exist
 if 'filters' not in st.session_state:
     st.session_state.filters = []
 
-# Calculate filtered data for all years
-filtered_df_2022 = apply_filters(df_2022, "2022", x_axis, y_axis, color, markersize)
-filtered_df_2023 = apply_filters(df_2023, "2023", x_axis, y_axis, color, markersize)
-filtered_df_2024 = apply_filters(df_2024, "2024", x_axis, y_axis, color, markersize)
-filtered_by_year = {"2022": filtered_df_2022, "2023": filtered_df_2023, "2024": filtered_df_2024}
-filtered_df = filtered_by_year[year]
-filtered_df_prev = filtered_by_year[growth_from]
-filtered_df_curr = filtered_by_year[growth_to]
-
 # Filter control buttons
 subcol1, subcol2 = col2.columns(2)
 with subcol1:
@@ -168,8 +80,8 @@ with subcol2:
 
 # Display existing filters using display names
 for i, filter in enumerate(st.session_state.filters):
-    filter_col = col2.selectbox(f"Filtr {i+1}", plot_display_names, key=f"filter_col_{i}")
-    filter_min, filter_max = df[filter_col.replace(year_placeholder, year)].min(), df[filter_col.replace(year_placeholder, year)].max()
+    filter_col = col2.selectbox(f"Filtr {i+1}", plot_columns, key=f"filter_col_{i}", format_func=label)
+    filter_min, filter_max = data[year][filter_col].min(), data[year][filter_col].max()
     filter_range = col2.slider(
         f"Filtr {i+1}",
         float(filter_min),
@@ -180,65 +92,71 @@ for i, filter in enumerate(st.session_state.filters):
     st.session_state.filters[i]['column'] = filter_col
     st.session_state.filters[i]['range'] = filter_range
 
-# Apply numerical filters (on already filtered_df)
-for filter in st.session_state.filters:
-    if filter['column'] is not None and filter['range'] is not None:
-        filtered_df = filtered_df[
-            (filtered_df[filter['column'].replace(year_placeholder, year)] >= filter['range'][0]) &
-            (filtered_df[filter['column'].replace(year_placeholder, year)] <= filter['range'][1])
-        ]
-
-# Update axis names after replacing placeholder
-markersize = markersize.replace(year_placeholder, year)
-x_axis = x_axis.replace(year_placeholder, year)
-y_axis = y_axis.replace(year_placeholder, year)
+# One mask per year in view (cached across sessions), built after the filter widgets so every year uses the current ranges
+groups = [Skupina] if st.session_state.filtrovat_dle_skupin else None
+filters = [(f['column'], f['range']) for f in st.session_state.filters
+           if f['column'] is not None and f['range'] is not None]
+filtered_by_year = {}
+for y in dict.fromkeys([year, growth_from, growth_to]):
+    rows = filter_cache().rows(data, y, groups, filters, required=[x_axis, y_axis, color, markersize])
+    filtered_by_year[y] = data.frame(y, rows)
+    # Replace negative marker sizes with 0
+    filtered_by_year[y][markersize] = filtered_by_year[y][markersize].clip(lower=0)
+filtered_df = filtered_by_year[year]
+filtered_df_prev = filtered_by_year[growth_from]
+filtered_df_curr = filtered_by_year[growth_to]
 
-# Ensure no negative values and remove NA for plotting
-filtered_df[markersize] = filtered_df[markersize].clip(lower=0)
-filtered_df = filtered_df.dropna(subset=[x_axis, y_axis, color, markersize])
+# Clicking a bubble adds its product to the selection below, or removes it if already selected
+def toggle_product(hs_id):
+    lookup = data.products.loc[hs_id, 'HS_Lookup']
+    selected = st.session_state.get('HS_select', [])
+    st.session_state.HS_select = [s for s in selected if s != lookup] if lookup in selected else selected + [lookup]
 
-HS_select = topsubcol2.multiselect("Filtrovat jednotlivé produkty", filtered_df['HS_Lookup'])
+HS_select = topsubcol2.multiselect("Filtrovat jednotlivé produkty", filtered_df['HS_Lookup'], key='HS_select')
 st.divider()
 
-hover_info = col2.multiselect("Co se zobrazí při najetí myší:", hover_display_data, default=['Název'])
-hover_data = get_hover_data(year, year_placeholder, hover_info, x_axis, y_axis, markersize)
+hover_info = col2.multiselect("Co se zobrazí při najetí myší:", hover_columns, default=['CZ_Nazev'], format_func=label)
+hover_data = get_hover_data(year, hover_info, x_axis, y_axis, markersize)
+
+# The chart shows display names, so the data columns are renamed only here
+chart_df = filtered_df.rename(columns=display_names(year))
+x_label, y_label, markersize_label = display_name(x_axis, year), display_name(y_axis, year), display_name(markersize, year)
+plot_decimals = get_plot_decimals(year)
 
+# Charts whose data and parameters did not change come back from memory
+charts = render_cache()
 bottom_text = "Analýza je založená na obchodních datech UN COMTRADE, která jsou vyčištěna organizací CEPII a publikována každý rok jako dataset BACI"
 
-if st.session_state.filtrovat_dle_skupin is False:
-    if HS_select == []:
-        chart_js = chartjs_plot(filtered_df, markersize, hover_data, color, x_axis, y_axis, year,
-                                  chart_title="České zelené příležitosti", bottom_text=bottom_text)
-    else:
-        chart_js = chartjs_plot(filtered_df[filtered_df['HS_Lookup'].isin(HS_select)],
-                                  markersize, hover_data, color, x_axis, y_axis, year,
-                                  chart_title="České zelené příležitosti", bottom_text=bottom_text)
-elif st.session_state.filtrovat_dle_skupin is True and Skupina is None:
-    chart_js = None
-elif st.session_state.filtrovat_dle_skupin is True and Skupina is not None:
+if st.session_state.filtrovat_dle_skupin is True and Skupina is None:
+    points = None
+else:
+    chart_title = Skupina if st.session_state.filtrovat_dle_skupin else "České zelené příležitosti"
     if HS_select == []:
-        chart_js = chartjs_plot(filtered_df, markersize, hover_data, color, x_axis, y_axis, year,
-                                  chart_title=Skupina, bottom_text=bottom_text)
+        points = charts.render(bubble_points, chart_df, markersize_label, hover_data, color, x_label, y_label, year,
+                               decimals=plot_decimals)
     else:
-        chart_js = chartjs_plot(filtered_df[filtered_df['HS_Lookup'].isin(HS_select)],
-                                  markersize, hover_data, color, x_axis, y_axis, year,
-                                  chart_title=Skupina, bottom_text=bottom_text)
+        points = charts.render(bubble_points, chart_df[chart_df['HS_Lookup'].isin(HS_select)],
+                               markersize_label, hover_data, color, x_label, y_label, year, decimals=plot_decimals)
 
-# Render chart in main area
-html_bytes = chart_js
-with col1:
-    components.html(chart_js, height=800,width=1500)
+# Render chart in main area; the component stays mounted and only receives the changed bubbles
+if points is not None:
+    with col1:
+        bubble_chart(points, x_label, y_label, chart_title=chart_title, bottom_text=bottom_text, on_click=toggle_product)
 
 # Example: render the polar area chart in a Streamlit component
-polar_js_skupiny = chart_highcharts_variable_pie(filtered_df_prev, filtered_df_curr, cz_export_prev,cz_export_curr,cz_green_export_prev,cz_green_export_curr,
-                              group_field="Skupina",
+# Both pies share one aggregation of the filtered exports per group
+pie_exports = export_by_group(filtered_df_prev, filtered_df_curr)
+filtered_total_prev = filtered_df_prev['ExportValueCZK'].sum()
+filtered_total_curr = filtered_df_curr['ExportValueCZK'].sum()
+polar_js_skupiny = charts.render(chart_highcharts_variable_pie, pie_exports["Skupina"], cz_export_prev,cz_export_curr,cz_green_export_prev,cz_green_export_curr,
+                              green_total_22_filtered=filtered_total_prev, green_total_23_filtered=filtered_total_curr,
                               chart_title="Růst exportu dle skupiny",
                               bottom_text=f"Šířka koláče vyjadřuje % z celkového českého exportu v roce {growth_to}<br>Vzdálenost dílu koláče od středu vyjadřuje růst skupiny mezi lety {growth_from} a {growth_to}",
                               usd_to_czk_22=USDtoCZKdefault(growth_from),
                               usd_to_czk_23=USDtoCZKdefault(growth_to),
                               year_from=growth_from, year_to=growth_to)
-polar_js_kategorie = chart_highcharts_variable_pie(filtered_df_prev, filtered_df_curr, cz_export_prev,cz_export_curr,cz_green_export_prev,cz_green_export_curr,
-                              group_field="Kategorie",
+polar_js_kategorie = charts.render(chart_highcharts_variable_pie, pie_exports["Kategorie"], cz_export_prev,cz_export_curr,cz_green_export_prev,cz_green_export_curr,
+                              green_total_22_filtered=filtered_total_prev, green_total_23_filtered=filtered_total_curr,
                               chart_title="Růst zeleného exportu dle kategorie",
                               bottom_text=f"Šířka koláče vyjadřuje % z českého zeleného exportu v roce {growth_to}<br>Vzdálenost dílu koláče od středu vyjadřuje růst kategorie mezi lety {growth_from} a {growth_to}",
                               usd_to_czk_22=USDtoCZKdefault(growth_from),
@@ -257,9 +175,9 @@ if HS_select == []:
     st.divider()
     mcol1, mcol2, mcol3, = st.columns(3)
     n_years = int(growth_to) - int(growth_from)
-    selected_CZ_growth = filtered_df_curr['Český export '+growth_to+' CZK'].sum() - filtered_df_prev['Český export '+growth_from+' CZK'].sum()
-    selected_CZ_growth_perc = (filtered_df_curr['Český export '+growth_to+' CZK'].sum() / filtered_df_prev['Český export '+growth_from+' CZK'].sum()) ** (1/n_years) - 1
-    mcol1.metric("Vybraný český export za rok "+year+"", "{:,.0f}".format(sum(filtered_df['Český export '+year+' CZK'])/1e9),'miliard CZK' )
+    selected_CZ_growth = filtered_df_curr['ExportValueCZK'].sum() - filtered_df_prev['ExportValueCZK'].sum()
+    selected_CZ_growth_perc = (filtered_df_curr['ExportValueCZK'].sum() / filtered_df_prev['ExportValueCZK'].sum()) ** (1/n_years) - 1
+    mcol1.metric("Vybraný český export za rok "+year+"", "{:,.0f}".format(sum(filtered_df['ExportValueCZK'])/1e9),'miliard CZK' )
     mcol2.metric("Růst vybraného českého exportu mezi lety "+growth_from+" a "+growth_to, "{:,.0f}".format(selected_CZ_growth/1e9), "miliard CZK")
     mcol3.metric("CAGR vybraného českého exportu "+growth_from+"–"+growth_to, "{:,.1%}".format(selected_CZ_growth_perc), "průměrný roční růst")
 
@@ -270,9 +188,9 @@ else:
     lookup_prev = filtered_df_prev['HS_Lookup'].isin(HS_select)
     lookup_curr = filtered_df_curr['HS_Lookup'].isin(HS_select)
     n_years = int(growth_to) - int(growth_from)
-    selected_CZ_growth = filtered_df_curr[lookup_curr]['Český export '+growth_to+' CZK'].sum() - filtered_df_prev[lookup_prev]['Český export '+growth_from+' CZK'].sum()
-    selected_CZ_growth_perc = (filtered_df_curr[lookup_curr]['Český export '+growth_to+' CZK'].sum() / filtered_df_prev[lookup_prev]['Český export '+growth_from+' CZK'].sum()) ** (1/n_years) - 1
-    mcol1.metric("Vybraný český export za rok "+year+"", "{:,.0f}".format(sum(filtered_df[lookup_year]['Český export '+year+' CZK'])/1e9),'miliard CZK' )
+    selected_CZ_growth = filtered_df_curr[lookup_curr]['ExportValueCZK'].sum() - filtered_df_prev[lookup_prev]['ExportValueCZK'].sum()
+    selected_CZ_growth_perc = (filtered_df_curr[lookup_curr]['ExportValueCZK'].sum() / filtered_df_prev[lookup_prev]['ExportValueCZK'].sum()) ** (1/n_years) - 1
+    mcol1.metric("Vybraný český export za rok "+year+"", "{:,.0f}".format(sum(filtered_df[lookup_year]['ExportValueCZK'])/1e9),'miliard CZK' )
     mcol2.metric("Růst vybraného českého exportu mezi lety "+growth_from+" a "+growth_to, "{:,.0f}".format(selected_CZ_growth/1e9), "miliard CZK")
     mcol3.metric("CAGR vybraného českého exportu "+growth_from+"–"+growth_to, "{:,.1%}".format(selected_CZ_growth_perc), "průměrný roční růst")
 
@@ -0,0 +1,154 @@
+import glob
+import json
+import os
+import re
+import threading
+
+import streamlit as st
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Per-year Parquet datasets built by BACI_analysis/app_dataset.py
+APP_DATA_DIR = 'BACI_analysis/outputs/app'
+
+# Default USD→CZK rate per year; a new year's dataset is offered only once its rate is added here
+USD_TO_CZK = {
+    "2022": 23.360,
+    "2023": 22.21,
+    "2024": 23.208,
+}
+
+# Product attributes — the same in every year, so they are stored once
+PRODUCT_COLUMNS = ['HS_ID', 'Skupina', 'Podskupina', 'Kategorie', 'CZ_Nazev', 'Barva Skupina', 'Barva Kategorie']
+# Metrics as written by the pipeline; ExportValue and WorldExport are in USD, WorldMarketShare is a fraction
+METRIC_COLUMNS = ['ExportValue', 'export_Rank', 'pci', 'relatedness', 'PCI_Percentile', 'relatedness_Percentile',
+                  'WorldExport', 'WorldMarketShare', 'hhi', 'euhhi', 'rca', 'EUTopExporter']
+
+
+def USDtoCZKdefault(year):
+    if year not in USD_TO_CZK:
+        raise KeyError(f"No USD→CZK rate for {year}, add it to USD_TO_CZK in mapatools/appdata.py")
+    return USD_TO_CZK[year]
+
+
+def available_years(country_iso3='CZE', directory=APP_DATA_DIR):
+    # Years are discovered from the dataset files; those without a USD→CZK rate cannot be shown yet
+    pattern = re.compile(rf'{country_iso3}_(\d{{4}})\.parquet$')
+    paths = glob.glob(os.path.join(directory, f'{country_iso3}_*.parquet'))
+    return sorted(m.group(1) for m in map(pattern.search, paths) if m and m.group(1) in USD_TO_CZK)
+
+
+def read_year(datayear, directory=APP_DATA_DIR):
+    """(products, metrics, total export in CZK) of one year's dataset, both frames indexed by HS_ID.
+
+    Metrics keep their canonical pipeline names; the CZK values are added as ExportValueCZK and
+    WorldExportCZK and the market share is converted to %.
+    """
+    USD_to_czk = USDtoCZKdefault(datayear)
+    table = pq.read_table(os.path.join(directory, 'CZE_' + datayear + '.parquet'))
+    metadata = json.loads(table.schema.metadata[b'mapa'])
+    df = table.to_pandas().set_index('HS_ID')
+
+    products = df[PRODUCT_COLUMNS[1:]].copy()
+    products['HS_Lookup'] = products.index.astype(str) + " - " + products['CZ_Nazev']
+    metrics = df[METRIC_COLUMNS].copy()
+    metrics['WorldMarketShare'] = 100 * metrics['WorldMarketShare']
+    metrics['ExportValueCZK'] = USD_to_czk * metrics['ExportValue']
+    metrics['WorldExportCZK'] = USD_to_czk * metrics['WorldExport']
+    return products, metrics, USD_to_czk * metadata['total_export']
+
+
+def sorted_index(metrics):
+    """For every numeric column, its values sorted ascending (NaN last) and the row positions in that order."""
+    index = {}
+    for column in metrics.select_dtypes('number').columns:
+        values = metrics[column].to_numpy(dtype=np.float64)
+        order = np.argsort(values, kind='stable')
+        index[column] = (values[order], order)
+    return index
+
+
+class YearRegistry:
+    """The app's metrics as one long table keyed by (year, HS_ID), filled one year at a time on first access.
+
+    Only the years a view actually touches are read. The registry is shared by every session
+    (see year_registry), so a year is loaded once per process.
+    """
+
+    def __init__(self, years=None, directory=APP_DATA_DIR):
+        self.directory = directory
+        self.years = list(years) if years is not None else available_years(directory=directory)
+        self.products = None
+        self.table = None
+        self.total_export = {}
+        # Row range of each loaded year in the table, and its sorted index (see sorted_index)
+        self._rows = {}
+        self._index = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.years)
+
+    def load(self, years):
+        """Load any of `years` not read yet and return the long table."""
+        with self._lock:
+            blocks = {}
+            for year in years:
+                if year in self._rows or year in blocks:
+                    continue
+                if year not in self.years:
+                    raise KeyError(f"No app dataset for {year} in {self.directory}")
+                products, metrics, self.total_export[year] = read_year(year, self.directory)
+                if self.products is None:
+                    self.products = products
+                # Rows are addressed by position across years, so every year follows the product order
+                unknown = metrics.index.difference(self.products.index)
+                if len(unknown):
+                    raise ValueError(f"The {year} app dataset has {len(unknown)} products missing from the other "
+                                     f"years (e.g. HS_ID {unknown[0]}), rebuild the app datasets")
+                blocks[year] = metrics.reindex(self.products.index)
+                self._index[year] = sorted_index(blocks[year])
+            if blocks:
+                blocks.update({y: self._block(y) for y in self._rows})
+                loaded = sorted(blocks)
+                self.table = pd.concat({y: blocks[y] for y in loaded}, names=['year'])
+                self._rows, start = {}, 0
+                for y in loaded:
+                    self._rows[y] = slice(start, start + len(blocks[y]))
+                    start += len(blocks[y])
+        return self.table
+
+    def _block(self, year):
+        # A positional slice of the table shares its data instead of copying it
+        return self.table.iloc[self._rows[year]].droplevel('year')
+
+    def __getitem__(self, year):
+        """Metrics of one year, indexed by HS_ID."""
+        self.load([year])
+        with self._lock:
+            return self._block(year)
+
+    def range_rows(self, year, column, low, high):
+        """Row positions (in value order) of the year's products with low <= column <= high.
+
+        Two binary searches in the sorted index; NaN is never in range.
+        """
+        self.load([year])
+        values, order = self._index[year][column]
+        return order[np.searchsorted(values, low, side='left'):np.searchsorted(values, high, side='right')]
+
+    def frame(self, year, rows=None):
+        """One year's metrics joined with the product attributes, with HS_ID as a column.
+
+        With `rows` (a boolean mask or row positions) only the selected rows are put together.
+        """
+        metrics = self[year]
+        if rows is None:
+            return self.products.join(metrics).reset_index()
+        return self.products.iloc[rows].join(metrics.iloc[rows]).reset_index()
+
+
+@st.cache_resource
+def year_registry():
+    return YearRegistry()
@@ -0,0 +1,110 @@
+# Pinned local copies of the chart libraries, served by Streamlit's static file serving.
+# Fetch them once with `python -m mapatools.assets` (from the app root) and deploy them with the app
+# (see README); with the files in STATIC_DIR and server.enableStaticServing on, the chart iframes load
+# them from the app instead of the CDNs, so the browser cache is reused across reruns and the app
+# works offline.
+# The same command copies the page images to IMAGE_DIR (rerun it when an image changes).
+import glob
+import hashlib
+import os
+import shutil
+import urllib.request
+
+import streamlit as st
+
+STATIC_DIR = 'static/vendor'
+# Relative to the page, so it also works under server.baseUrlPath; chart iframes use the page's base URL
+STATIC_URL = 'app/static/vendor'
+
+# Copies of the page images (header, background, partner logos), linked by URL instead of inlined
+IMAGE_DIR = 'static/images'
+IMAGE_URL = 'app/static/images'
+PAGE_IMAGES = ['resources/header.jpg', 'resources/background.svg', 'resources/partners/*.png']
+
+# name: (local file, CDN URL) — the version is part of the file name, so a new pin is a new URL
+LIBRARIES = {
+    'chartjs': ('chart-4.4.1.umd.js', 'https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.js'),
+    'highcharts': ('highcharts-11.4.8.js', 'https://code.highcharts.com/11.4.8/highcharts.js'),
+    'variable-pie': ('variable-pie-11.4.8.js', 'https://code.highcharts.com/11.4.8/modules/variable-pie.js'),
+}
+
+
+def fetch_libraries(static_dir=STATIC_DIR):
+    """Download every pinned library missing from `static_dir`."""
+    os.makedirs(static_dir, exist_ok=True)
+    for filename, url in LIBRARIES.values():
+        path = os.path.join(static_dir, filename)
+        if os.path.exists(path):
+            continue
+        with urllib.request.urlopen(url, timeout=60) as response:
+            content = response.read()
+        with open(path + '.tmp', 'wb') as f:
+            f.write(content)
+        os.replace(path + '.tmp', path)
+        print(f'Saved {path}')
+
+
+def library_url(name):
+    """The local static URL of a library when it is served by the app, else its pinned CDN URL."""
+    filename, cdn_url = LIBRARIES[name]
+    if st.get_option('server.enableStaticServing') and os.path.exists(os.path.join(STATIC_DIR, filename)):
+        return f'{STATIC_URL}/{filename}'
+    return cdn_url
+
+
+def file_digest(path):
+    """Short content hash of a file, used in the names of its static copies."""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def static_copy_name(path):
+    # Named after the content hash, so a changed file gets a new URL
+    stem, ext = os.path.splitext(os.path.basename(path))
+    return f'{stem}-{file_digest(path)}{ext}'
+
+
+def copy_images(static_dir=IMAGE_DIR):
+    """Copy the PAGE_IMAGES to `static_dir` under their static_copy_name and delete outdated copies."""
+    os.makedirs(static_dir, exist_ok=True)
+    expected = set()
+    for pattern in PAGE_IMAGES:
+        for path in sorted(glob.glob(pattern)):
+            filename = static_copy_name(path)
+            expected.add(filename)
+            target = os.path.join(static_dir, filename)
+            if os.path.exists(target):
+                continue
+            shutil.copyfile(path, target + '.tmp')
+            os.replace(target + '.tmp', target)
+            print(f'Saved {target}')
+    for filename in sorted(set(os.listdir(static_dir)) - expected):
+        os.remove(os.path.join(static_dir, filename))
+        print(f'Removed {filename}')
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _static_copy_name(path, mtime):
+    return static_copy_name(path)
+
+
+def static_copy_url(path, static_dir=IMAGE_DIR, static_url=IMAGE_URL):
+    """URL of the copy of `path` made by copy_images, or None when static serving is off or there is none.
+
+    Only looks the copy up, so rendering a page never writes files.
+    """
+    if not st.get_option('server.enableStaticServing'):
+        return None
+    filename = _static_copy_name(path, os.path.getmtime(path))
+    if not os.path.exists(os.path.join(static_dir, filename)):
+        return None
+    return f'{static_url}/{filename}'
+
+
+def script_tags(*names):
+    return '\n    '.join(f'<script src="{library_url(name)}"></script>' for name in names)
+
+
+if __name__ == '__main__':
+    copy_images()
+    fetch_libraries()
@@ -0,0 +1,76 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+import pandas as pd
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU cache with hit/miss counters, meant to be shared by every session of the process."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """The value cached under `key`, or compute() stored under it on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        # Computed outside the lock, so a slow miss does not block other sessions' hits
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def info(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+
+def fingerprint(*args, **kwargs):
+    """SHA-256 of chart arguments; DataFrames are hashed by columns, dtypes, index and values."""
+    digest = hashlib.sha256()
+    for value in list(args) + sorted(kwargs.items()):
+        _update(digest, value)
+    return digest.hexdigest()
+
+
+def _update(digest, value):
+    if isinstance(value, pd.DataFrame):
+        digest.update(repr((list(value.columns), [str(dtype) for dtype in value.dtypes],
+                            list(value.index.names))).encode())
+        # The index is part of the data, e.g. the group names of export_by_group
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, tuple):
+        for item in value:
+            _update(digest, item)
+    else:
+        digest.update(repr(value).encode())
+    # Separator, so adjacent values cannot run together
+    digest.update(b'\0')
+
+
+class RenderCache(LRUCache):
+    """Rendered chart HTML keyed by the chart function and a fingerprint of its data and parameters.
+
+    An unchanged chart returns the very same string, so components.html gets an identical payload.
+    """
+
+    def render(self, chart, *args, **kwargs):
+        key = (chart.__module__, chart.__qualname__, fingerprint(*args, **kwargs))
+        return self.get(key, lambda: chart(*args, **kwargs))
+
+
+@st.cache_resource
+def render_cache():
+    return RenderCache(maxsize=64)
@@ -1,10 +1,32 @@
+import os
+from functools import partial
 import pandas as pd
 import json
-import itertools
 import numpy as np
-from mapatools.variable_names import get_hover_formatting
+import streamlit as st
+import streamlit.components.v1 as components
+from mapatools.variable_names import display_name, get_hover_formatting
+from mapatools.serialize import to_json, rounded
+from mapatools.assets import library_url, script_tags
 
-def chartjs_plot(filtered_df, markersize, hover_data, color, x_axis, y_axis, year,chart_title="Chart Title",bottom_text="Bottom Text"):
+# Chart.js code shared by chartjs_plot and the bubble_chart component
+FRONTEND_DIR = os.path.join(os.path.dirname(__file__), 'frontend', 'bubble')
+with open(os.path.join(FRONTEND_DIR, 'bubble.js'), encoding='utf-8') as f:
+    BUBBLE_JS = f.read()
+
+# Columns of a bubble_points frame before the hover fields
+POINT_COLUMNS = ['label', 'color', 'x', 'y', 'r']
+
+_bubble_component = components.declare_component('bubble_chart', path=FRONTEND_DIR)
+
+
+def bubble_points(filtered_df, markersize, hover_data, color, x_axis, y_axis, year, decimals=None):
+    """One row per bubble, indexed by HS_ID: its dataset label and color, x, y, radius and hover fields.
+
+    The hover fields are the columns after POINT_COLUMNS, already formatted as shown in the tooltip.
+    """
+    # decimals: {column: number of decimals} for the x/y values sent to the browser (default: full precision)
+    decimals = decimals or {}
     # Min-Max scaling for markersize (normalize to range like 2-32)
     min_size = filtered_df[markersize].min()
     max_size = filtered_df[markersize].max()
@@ -12,7 +34,7 @@ def chartjs_plot(filtered_df, markersize, hover_data, color, x_axis, y_axis, yea
 
     # Avoid division by zero in case all values are the same
     if max_size == min_size:
-        filtered_df["scaled_size"] = 10  # Assign a medium default size
+        scaled_size = pd.Series(10, index=filtered_df.index)  # Assign a medium default size
     else:
         # Apply log scaling: map input range to output range [2, 32]
         # Use np.log to apply log scaling
@@ -20,280 +42,138 @@ def chartjs_plot(filtered_df, markersize, hover_data, color, x_axis, y_axis, yea
         log_max = np.sqrt(max_size + 1)
 
         # Scale the size based on the log of the values
-        filtered_df["scaled_size"] = ((np.sqrt(filtered_df[markersize] + 1) - log_min) / (log_max - log_min)) * 30 + 2
+        scaled_size = ((np.sqrt(filtered_df[markersize] + 1) - log_min) / (log_max - log_min)) * 30 + 2
 
     # --- Assume get_hover_formatting returns dictionaries like before ---
     no_decimal, two_sigfig, percentage, texthover = get_hover_formatting(year)
 
-    # --- Assume format_hover_data function is defined as before ---
-
-    def format_hover_data(key, value):
-
+    def format_hover_column(key):
+        # Formats a whole column at once into the strings shown in the tooltip
+        values = filtered_df[key]
         if key in no_decimal:
-            return "{:,.0f}".format(value) # No decimals, thousands separator
+            return values.map("{:,.0f}".format) # No decimals, thousands separator
         elif key in two_sigfig:
-            return "{:.2f}".format(value) # 2 decimal places
+            return values.map("{:.2f}".format) # 2 decimal places
         elif key in percentage:
-            return "{:.1f}%".format(value) # Convert to percentage
-        elif key in texthover:
-            return str(value)
+            return values.map("{:.1f}%".format) # Convert to percentage
         else:
-            return value # No special formatting
-    
-    grouped_data = {}
-    for _, row in filtered_df.iterrows():
-        color_category = row[color]
-        assigned_color = row["Barva "+color]#color_discrete_map.get(color_category, next(color_cycle))
-
-        # Create the basic data point structure
-        data_point = {
-             "x": row[x_axis],
-             "y": row[y_axis],
-             "r": row["scaled_size"],
-             "meta": {} # Initialize meta dictionary here
-        }
-        # Populate meta dictionary - *** MODIFIED LOGIC ***
-        for key in hover_data:
-             # Check if the key should be included (value is not False)
-            if hover_data.get(key) is not False:
-                # Format the value using your existing function
-                value = format_hover_data(key, row[key])
-                 # Store the value directly, preserving any <br> tags. NO MORE SPLITTING.
-                data_point["meta"][key] = str(value) # Ensure it's a string
-        # Sort meta dictionary alphabetically (optional, but good for consistency below title)
-        # We will handle Název separately in JS, sorting affects the rest
-        data_point["meta"] = dict(sorted(data_point["meta"].items()))
-        # Add the complete data point to the correct group
-        if color_category not in grouped_data:
-            grouped_data[color_category] = {"data": [], "color": assigned_color, "_originalBackgroundColor": assigned_color} # Add original color store here too if not already done
-        grouped_data[color_category]["data"].append(data_point)
-
-        # --- Create datasets with default transparency ---
-        default_alpha_hex = 'CC' # Set desired default alpha (~80% opaque)
-
-        datasets = [
+            return values.map(str) # Text and anything without special formatting
+
+    # Meta keys in alphabetical order (Název is handled separately in JS, sorting affects the rest)
+    meta_keys = sorted(key for key in hover_data if hover_data.get(key) is not False)
+    points = pd.DataFrame({
+        'label': filtered_df[color].astype(str).to_numpy(),
+        'color': filtered_df["Barva " + color].astype(str).to_numpy(),
+        'x': rounded(filtered_df[x_axis].to_numpy(), decimals.get(x_axis)),
+        'y': rounded(filtered_df[y_axis].to_numpy(), decimals.get(y_axis)),
+        'r': rounded(scaled_size.to_numpy(), 2),  # Bubble radius in pixels
+    }, index=pd.Index(filtered_df[display_name('HS_ID', year)].to_numpy(), name='HS_ID'))
+    for key in meta_keys:
+        points[key] = format_hover_column(key).to_numpy()
+    return points
+
+
+def bubble_payload(points):
+    """Compact JSON-ready payload of a bubble_points frame for bubble.js.
+
+    One dataset per color category in order of appearance, with parallel id/x/y/r arrays and one
+    array per hover field (named once in "keys"); the browser turns them into Chart.js points.
+    """
+    meta_keys = list(points.columns[len(POINT_COLUMNS):])
+    groups = points.groupby('label', sort=False)
+    category_colors = groups['color'].first()
+    ids = points.index.to_numpy()
+    columns = {column: points[column].to_numpy() for column in points.columns}
+    return {
+        "keys": meta_keys,
+        "datasets": [
             {
                 "label": category,
-                "data": group_info["data"],
-                "backgroundColor": group_info["color"] + default_alpha_hex, # Default appearance
-                "borderColor": group_info["color"] + default_alpha_hex, # Default appearance
-                "_originalBackgroundColor": group_info["_originalBackgroundColor"], # OPAQUE color
-                # *** ADD DEFAULT TRANSPARENT COLOR FOR RESETTING ***
-                "_defaultBackgroundColor": group_info["color"] + default_alpha_hex,
-                "borderWidth": 1,
-                "hoverRadius": 5, # May be overridden by JS element options
-                # "clip": 100
-            }for category, group_info in grouped_data.items()]
+                "color": category_colors[category],
+                "ids": ids[positions],
+                "x": columns['x'][positions],
+                "y": columns['y'][positions],
+                "r": columns['r'][positions],
+                "meta": [columns[key][positions] for key in meta_keys],
+            } for category, positions in groups.indices.items()]
+    }
 
-    # Convert datasets to JSON
-    # Use a custom encoder if you have non-standard types (like lambdas, though they won't serialize)
 
+def chart_options(x_axis, y_axis, chart_title, bottom_text):
+    return {'title': chart_title, 'subtitle': bottom_text, 'xLabel': x_axis, 'yLabel': y_axis}
 
-    datasets_json = json.dumps(datasets)
-    x_label = json.dumps(x_axis)
-    y_label = json.dumps(y_axis)
+
+def chartjs_plot(filtered_df, markersize, hover_data, color, x_axis, y_axis, year,chart_title="Chart Title",bottom_text="Bottom Text",decimals=None):
+    """Standalone HTML of the bubble chart, e.g. for components.html or an export."""
+    points = bubble_points(filtered_df, markersize, hover_data, color, x_axis, y_axis, year, decimals)
+    payload_json = to_json(bubble_payload(points))
+    options_json = json.dumps(chart_options(x_axis, y_axis, chart_title, bottom_text))
 
     # Generate the JavaScript chart code
     chart_js = f"""
     <div style="width:100%; height:700px; position: relative; margin: 0; padding: 0; box-sizing: border-box;">
         <canvas id="myBubbleChart" style="width: 100% !important; height: 100% !important; display: block;"></canvas>
     </div>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
+    {script_tags('chartjs')}
     <script>
-        var ctx = document.getElementById('myBubbleChart').getContext('2d');
-        var datasets = {datasets_json}; // Load datasets from Python
-
-        // --- Optional: Add original color back if needed post-JSON parsing ---
-        // Not strictly necessary if we use the _originalBackgroundColor added above
-        Chart.defaults.font.family = 'Montserrat, sans-serif';
-        var myBubbleChart = new Chart(ctx, {{
-            type: 'bubble',
-            data: {{
-                datasets: datasets // Use the datasets variable
-            }},
-            options: {{
-                responsive: true,
-                maintainAspectRatio: false,
-                resizeDelay: 0,
-                layout: {{
-                    padding: 0
-                }},
-                scales: {{
-                    x: {{ title: {{ display: true, text: {x_label} }} }},
-                    y: {{ title: {{ display: true, text: {y_label} }} }}
-                }},
-                animation: {{ duration: 500 }}, // Disable default animations if hover is jerky
-                transitions: {{
-                    active: {{ animation: {{ duration: 500 }} }} // Faster response on hover
-                }},
-
-                onHover: (event, elements, chart) => {{
-                // 1. Reset ALL datasets to the DEFAULT transparent state first
-                chart.data.datasets.forEach(dataset => {{
-                    // Use the stored default color with transparency
-                    const defaultColor = dataset._defaultBackgroundColor || dataset.backgroundColor; // Fallback
-                    dataset.backgroundColor = defaultColor;
-                    dataset.borderColor = defaultColor; // Assuming border matches fill
-                }});
-
-                // 2. If hovering over an element, apply specific styles
-                if (elements.length > 0) {{
-                    const hoveredDatasetIndex = elements[0].datasetIndex;
-
-                    chart.data.datasets.forEach((dataset, index) => {{
-                        if (index === hoveredDatasetIndex) {{
-                            // Make the HOVERED dataset OPAQUE
-                            dataset.backgroundColor = dataset._originalBackgroundColor;
-                            dataset.borderColor = dataset._originalBackgroundColor;
-                        }} else {{
-                            // Make INACTIVE datasets HIGHLY transparent ('0D' alpha)
-                            // Add '0D' to the OPAQUE original color
-                            dataset.backgroundColor = dataset._originalBackgroundColor + '0D';
-                            dataset.borderColor = dataset._originalBackgroundColor + '0D';
-                        }}
-                    }});
-                }}
-                // 3. Update the chart (No 'else' needed, step 1 handles reset)
-                chart.update(); // Use 'none' for smoother updates without animation flicker
-            }},
-
-                plugins: {{
-                    title: {{
-                        display: true,
-                        text: {json.dumps(chart_title)},
-                        font: {{
-                        size: 25
-                        }}
-                    }},
-                    subtitle: {{
-                        display: true,
-                        text: {json.dumps(bottom_text)},
-                        position: 'bottom',
-                        padding: {{
-                            top: 10
-                        }},
-                        font: {{
-                            size: 14
-                        }}
-                    }},
-                    legend: {{
-                        // --- Your existing legend onClick logic ---
-                        onClick: (event, item, legend) => {{
-                            const datasetIndex = item.datasetIndex;
-                            const chart = legend.chart;
-                            if (chart._isolatedDatasetIndex === undefined) {{
-                                chart._isolatedDatasetIndex = null;
-                            }}
-                            if (chart._isolatedDatasetIndex === datasetIndex) {{
-                                chart.data.datasets.forEach((ds, index) => {{
-                                    chart.setDatasetVisibility(index, true);
-                                     // Restore original colors when un-isolating
-                                    if(ds._defaultBackgroundColor) {{
-                                        ds.backgroundColor = ds._defaultBackgroundColor;
-                                        ds.borderColor = ds._defaultBackgroundColor;
-                                    }}
-                                }});
-                                chart._isolatedDatasetIndex = null;
-                            }} else {{
-                                chart.data.datasets.forEach((ds, index) => {{
-                                    chart.setDatasetVisibility(index, index === datasetIndex);
-                                     // Restore original colors before hiding/showing
-                                     if(ds._defaultBackgroundColor) {{
-                                        ds.backgroundColor = ds._defaultBackgroundColor;
-                                        ds.borderColor = ds._defaultBackgroundColor;
-                                    }}
-                                }});
-                                chart._isolatedDatasetIndex = datasetIndex;
-                            }}
-                            chart.update();
-                        }},
-                        labels: {{ usePointStyle: true, padding: 10 }}
-                    }},
-                    tooltip: {{
-                        // Use callbacks for custom tooltip content
-                        callbacks: {{
-                            // ** Use the 'title' callback for 'Název' **
-                            // It's typically bold by default.
-                            title: function(tooltipItems) {{
-                                // tooltipItems is an array, we usually use the first item
-                                if (!tooltipItems.length) {{
-                                    return '';
-                                }}
-                                const context = tooltipItems[0];
-                                const data = context.dataset.data[context.dataIndex];
-
-                                // Check if 'Název' exists in our meta data
-                                if (data.meta && data.meta.hasOwnProperty('Název')) {{
-                                    // Split the 'Název' string by '<br>' to create multiple lines
-                                    // Chart.js handles an array return as multiple title lines
-                                    return data.meta['Název'].split('<br>');
-                                }}
-                                return ''; // Return empty string if no 'Název'
-                            }},
+{BUBBLE_JS}
+    </script>
+    <script>
+        var myBubbleChart = createBubbleChart(document.getElementById('myBubbleChart'), {options_json}, {payload_json});
+    </script>
+    """
+    return chart_js
 
-                            // ** Optional: Add space after title if Název existed **
-                            afterTitle: function(tooltipItems) {{
-                                const context = tooltipItems[0];
-                                const data = context.dataset.data[context.dataIndex];
-                                // Add space only if Název was shown and there are other items
-                                if (data.meta && data.meta.hasOwnProperty('Název') && Object.keys(data.meta).length > 1) {{
-                                     // Return an empty string or one with just space to force a line
-                                    return ' '; // Creates visual separation
-                                }}
-                                return '';
-                            }},
 
+def points_diff(old, new):
+    """(removed ids, new and changed points) turning the bubble_points frame `old` into `new`."""
+    removed = old.index.difference(new.index)
+    shared = new.index.isin(old.index)
+    before = old.loc[new.index[shared], new.columns].to_numpy()
+    unchanged = np.zeros(len(new), dtype=bool)
+    unchanged[shared] = (before == new[shared].to_numpy()).all(axis=1)
+    return removed, new[~unchanged]
 
-                            // ** Use 'beforeBody' to generate the Key: Value lines for other items **
-                            // Returns an array of strings, each becoming a line in the tooltip body.
-                            beforeBody: function(tooltipItems) {{
-                                const context = tooltipItems[0];
-                                const data = context.dataset.data[context.dataIndex];
-                                const bodyLines = []; // Array to hold our custom body lines
 
-                                if (data.meta) {{
-                                    // Iterate through the keys (already sorted in Python)
-                                    for (const key in data.meta) {{
-                                        // Make sure the key is not 'Název' (already handled in title)
-                                        if (key !== 'Název' && data.meta.hasOwnProperty(key)) {{
-                                            // Format as "Key: Value"
-                                            bodyLines.push(`${{key}}: ${{data.meta[key]}}`);
-                                        }}
-                                    }}
-                                }}
-                                return bodyLines; // Return the array of lines
-                            }},
+def _handle_event(key, on_click):
+    event = st.session_state[key]
+    if event is None:
+        return
+    if event.get('event') == 'resync':
+        # The chart lost its data (e.g. the iframe was reloaded): send everything on this rerun
+        st.session_state[f'{key}_sent'].pop('points', None)
+    elif event.get('event') == 'click' and on_click is not None:
+        on_click(event['id'])
 
-                            // ** Disable the default label **
-                            // Since we are generating the body content in beforeBody,
-                            // we don't need the default label (which usually shows dataset label & y-value).
-                            label: function(context) {{
-                                return null; // Returning null prevents the default label line
-                            }},
 
-                            // ** Optional: Hide the color swatch next to the label **
-                            // Since we disabled the default label, you might not want the color box either.
-                            labelColor: function(context) {{
-                                return null; // Returning null hides the color box
-                                // Alternative: return {{ borderColor: 'transparent', backgroundColor: 'transparent' }};
-                            }}
+def bubble_chart(points, x_axis, y_axis, chart_title="Chart Title", bottom_text="Bottom Text",
+                 height=800, key='bubble_chart', on_click=None):
+    """Render bubble_points in a component that is mounted once and then only receives changes.
 
-                        }} // end callbacks
-                    }} // end tooltip
-                }}
-            }}
-        }});
+    The data last sent is kept in the session; each rerun sends the points removed, added or
+    changed since then (or everything, when the hover fields change or the chart asks to resync),
+    and the chart redraws them without animation. on_click(HS_ID) is called, as a widget callback,
+    when a bubble is clicked.
+    """
+    sent = st.session_state.setdefault(f'{key}_sent', {'version': 0})
+    previous = sent.get('points')
+    options = chart_options(x_axis, y_axis, chart_title, bottom_text)
+    if previous is None or list(previous.columns) != list(points.columns):
+        spec = {'base': None, 'reset': bubble_payload(points)}
+    elif previous is not points and not previous.equals(points) or options != sent['options']:
+        removed, upsert = points_diff(previous, points)
+        datasets = points.drop_duplicates('label')
+        spec = {'base': sent['version'], 'diff': {
+            'datasets': [{'label': label, 'color': color} for label, color in zip(datasets['label'], datasets['color'])],
+            'remove': removed.to_numpy(),
+            'upsert': bubble_payload(upsert),
+        }}
+    else:
+        spec = None  # Nothing changed: the chart ignores the spec it already has
 
-        // Optional: Add logic to reset hover state if mouse leaves canvas
-        ctx.canvas.addEventListener('mouseout', () => {{
-             myBubbleChart.data.datasets.forEach(dataset => {{
-                const originalColor = dataset._defaultBackgroundColor || dataset.backgroundColor;
-                 dataset.backgroundColor = originalColor;
-                 dataset.borderColor = originalColor;
-            }});
-            myBubbleChart.update('none');
-        }});
+    if spec is not None:
+        spec.update(version=sent['version'] + 1, options=options)
+        sent.update(version=spec['version'], points=points, options=options, spec=to_json(spec))
 
-    </script>
-    """
-    return chart_js
+    return _bubble_component(spec=sent['spec'], library=library_url('chartjs'), height=height, key=key,
+                             default=None, on_change=partial(_handle_event, key, on_click))
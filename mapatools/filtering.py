@@ -0,0 +1,56 @@
+import streamlit as st
+import numpy as np
+
+from mapatools.cache import LRUCache
+
+
+def year_rows(data, year, groups=None, filters=(), required=()):
+    """Sorted row positions of one year's products of a YearRegistry.
+
+    Keeps the products in `groups` (all if None), inside every (column, (low, high)) range in `filters`
+    and with a value in each of the `required` columns. Ranges and missing metrics are slices of the
+    registry's sorted index, intersected; only the product attributes are checked row by row.
+    """
+    attributes = data.products.columns
+    ranges = list(filters) + [(column, (-np.inf, np.inf)) for column in required if column not in attributes]
+    rows = np.arange(len(data.products))
+    for i, (column, (low, high)) in enumerate(ranges):
+        selected = data.range_rows(year, column, low, high)
+        rows = np.sort(selected) if i == 0 else np.intersect1d(rows, selected, assume_unique=True)
+
+    mask = np.ones(len(data.products), dtype=bool)
+    if groups is not None:
+        mask &= data.products['Skupina'].isin(groups).to_numpy()
+    for column in required:
+        if column in attributes:
+            mask &= data.products[column].notna().to_numpy()
+    return rows[mask[rows]]
+
+
+class FilterCache(LRUCache):
+    """Bounded LRU cache of the filtered row positions of a year, shared by every session of the process.
+
+    Entries are keyed by the normalized filter state, so the same view reached in a different order
+    (or by another user) is a hit. hits/misses count lookups since the process started.
+    """
+
+    @staticmethod
+    def key(year, groups=None, filters=(), required=()):
+        # Filters are ANDed, so their order and repetitions do not matter
+        return (year,
+                None if groups is None else frozenset(groups),
+                frozenset((column, float(low), float(high)) for column, (low, high) in filters),
+                frozenset(required))
+
+    def rows(self, data, year, groups=None, filters=(), required=()):
+        """year_rows(...), computed on a miss and kept read-only in the cache."""
+        def compute():
+            rows = year_rows(data, year, groups, filters, required)
+            rows.setflags(write=False)
+            return rows
+        return self.get(self.key(year, groups, filters, required), compute)
+
+
+@st.cache_resource
+def filter_cache():
+    return FilterCache()
@@ -0,0 +1,297 @@
+// Chart.js bubble chart shared by chartjs_plot (a static iframe) and the bubble_chart component.
+// Data comes as a columnar payload built in mapatools/chartjsbubble.py:
+//   {keys: [hover keys], datasets: [{label, color, ids, x, y, r, meta: [one array per key]}]}
+// and is turned into Chart.js points {id, x, y, r, meta} here.
+
+var defaultAlphaHex = 'CC'; // Set desired default alpha (~80% opaque)
+
+// --- Chart.js dataset of one color category with default transparency ---
+function bubbleDataset(label, color) {
+    return {
+        label: label,
+        data: [],
+        backgroundColor: color + defaultAlphaHex, // Default appearance
+        borderColor: color + defaultAlphaHex, // Default appearance
+        _originalBackgroundColor: color, // OPAQUE color
+        _defaultBackgroundColor: color + defaultAlphaHex, // Default transparent color for resetting
+        borderWidth: 1,
+        hoverRadius: 5 // May be overridden by JS element options
+    };
+}
+
+function setDatasetColor(dataset, color) {
+    dataset._originalBackgroundColor = color;
+    dataset._defaultBackgroundColor = color + defaultAlphaHex;
+    dataset.backgroundColor = dataset._defaultBackgroundColor;
+    dataset.borderColor = dataset._defaultBackgroundColor;
+}
+
+// Points of one payload dataset, with the hover fields in the order of the payload keys
+function payloadPoints(ds) {
+    return ds.x.map((x, i) => ({
+        id: ds.ids[i], x: x, y: ds.y[i], r: ds.r[i],
+        meta: ds.meta.map(values => values[i])
+    }));
+}
+
+// Hover fields of one point as {key: value}, in the (alphabetical) order of the chart's keys
+function pointMeta(context) {
+    const meta = {};
+    context.chart.$metaKeys.forEach((key, k) => {
+        meta[key] = context.raw.meta[k];
+    });
+    return meta;
+}
+
+function resetColors(chart) {
+    chart.data.datasets.forEach(dataset => {
+        const originalColor = dataset._defaultBackgroundColor || dataset.backgroundColor;
+        dataset.backgroundColor = originalColor;
+        dataset.borderColor = originalColor;
+    });
+}
+
+function payloadDatasets(payload) {
+    return payload.datasets.map(ds => {
+        const dataset = bubbleDataset(ds.label, ds.color);
+        dataset.data = payloadPoints(ds);
+        return dataset;
+    });
+}
+
+// Replace all data of the chart with a full payload (does not redraw)
+function setBubbleData(chart, payload) {
+    chart.$metaKeys = payload.keys;
+    chart.data.datasets = payloadDatasets(payload);
+    chart._isolatedDatasetIndex = null;
+}
+
+// Apply a diff to the chart's data (does not redraw):
+//   {datasets: [{label, color}] in their new order, remove: [ids], upsert: payload of new and changed points}
+// Datasets that stay keep their Chart.js objects, so hover and legend state survive the update.
+function applyBubbleDiff(chart, diff) {
+    const replaced = new Set(diff.remove);
+    diff.upsert.datasets.forEach(ds => ds.ids.forEach(id => replaced.add(id)));
+
+    const current = new Map(chart.data.datasets.map(dataset => [dataset.label, dataset]));
+    const isolated = chart._isolatedDatasetIndex != null ? chart.data.datasets[chart._isolatedDatasetIndex] : null;
+    chart.data.datasets = diff.datasets.map(ds => {
+        const dataset = current.get(ds.label) || bubbleDataset(ds.label, ds.color);
+        if (dataset._originalBackgroundColor !== ds.color) {
+            setDatasetColor(dataset, ds.color);
+        }
+        dataset.data = dataset.data.filter(point => !replaced.has(point.id));
+        return dataset;
+    });
+    const byLabel = new Map(chart.data.datasets.map(dataset => [dataset.label, dataset]));
+    diff.upsert.datasets.forEach(ds => {
+        byLabel.get(ds.label).data.push(...payloadPoints(ds));
+    });
+
+    // An isolated category stays isolated if it is still in the chart
+    const index = chart.data.datasets.indexOf(isolated);
+    chart._isolatedDatasetIndex = index >= 0 ? index : null;
+    chart.data.datasets.forEach((dataset, i) => {
+        chart.setDatasetVisibility(i, chart._isolatedDatasetIndex === null || i === chart._isolatedDatasetIndex);
+    });
+}
+
+// Titles and axis labels: {title, subtitle, xLabel, yLabel} (does not redraw)
+function setBubbleOptions(chart, options) {
+    chart.options.plugins.title.text = options.title;
+    chart.options.plugins.subtitle.text = options.subtitle;
+    chart.options.scales.x.title.text = options.xLabel;
+    chart.options.scales.y.title.text = options.yLabel;
+}
+
+// Create the chart on `canvas`; onPointClick(id) is called when a bubble is clicked
+function createBubbleChart(canvas, options, payload, onPointClick) {
+    Chart.defaults.font.family = 'Montserrat, sans-serif';
+    var chart = new Chart(canvas.getContext('2d'), {
+        type: 'bubble',
+        data: {
+            datasets: payloadDatasets(payload)
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            resizeDelay: 0,
+            layout: {
+                padding: 0
+            },
+            scales: {
+                x: { title: { display: true, text: options.xLabel } },
+                y: { title: { display: true, text: options.yLabel } }
+            },
+            animation: { duration: 500 }, // Disable default animations if hover is jerky
+            transitions: {
+                active: { animation: { duration: 500 } } // Faster response on hover
+            },
+
+            onClick: (event, elements, chart) => {
+                if (onPointClick && elements.length > 0) {
+                    const element = elements[0];
+                    onPointClick(chart.data.datasets[element.datasetIndex].data[element.index].id);
+                }
+            },
+
+            onHover: (event, elements, chart) => {
+            // 1. Reset ALL datasets to the DEFAULT transparent state first
+            resetColors(chart);
+
+            // 2. If hovering over an element, apply specific styles
+            if (elements.length > 0) {
+                const hoveredDatasetIndex = elements[0].datasetIndex;
+
+                chart.data.datasets.forEach((dataset, index) => {
+                    if (index === hoveredDatasetIndex) {
+                        // Make the HOVERED dataset OPAQUE
+                        dataset.backgroundColor = dataset._originalBackgroundColor;
+                        dataset.borderColor = dataset._originalBackgroundColor;
+                    } else {
+                        // Make INACTIVE datasets HIGHLY transparent ('0D' alpha)
+                        // Add '0D' to the OPAQUE original color
+                        dataset.backgroundColor = dataset._originalBackgroundColor + '0D';
+                        dataset.borderColor = dataset._originalBackgroundColor + '0D';
+                    }
+                });
+            }
+            // 3. Update the chart (No 'else' needed, step 1 handles reset)
+            chart.update(); // Use 'none' for smoother updates without animation flicker
+        },
+
+            plugins: {
+                title: {
+                    display: true,
+                    text: options.title,
+                    font: {
+                    size: 25
+                    }
+                },
+                subtitle: {
+                    display: true,
+                    text: options.subtitle,
+                    position: 'bottom',
+                    padding: {
+                        top: 10
+                    },
+                    font: {
+                        size: 14
+                    }
+                },
+                legend: {
+                    // Clicking a category isolates it, clicking it again shows all categories
+                    onClick: (event, item, legend) => {
+                        const datasetIndex = item.datasetIndex;
+                        const chart = legend.chart;
+                        if (chart._isolatedDatasetIndex === undefined) {
+                            chart._isolatedDatasetIndex = null;
+                        }
+                        if (chart._isolatedDatasetIndex === datasetIndex) {
+                            chart.data.datasets.forEach((ds, index) => {
+                                chart.setDatasetVisibility(index, true);
+                                 // Restore original colors when un-isolating
+                                if(ds._defaultBackgroundColor) {
+                                    ds.backgroundColor = ds._defaultBackgroundColor;
+                                    ds.borderColor = ds._defaultBackgroundColor;
+                                }
+                            });
+                            chart._isolatedDatasetIndex = null;
+                        } else {
+                            chart.data.datasets.forEach((ds, index) => {
+                                chart.setDatasetVisibility(index, index === datasetIndex);
+                                 // Restore original colors before hiding/showing
+                                 if(ds._defaultBackgroundColor) {
+                                    ds.backgroundColor = ds._defaultBackgroundColor;
+                                    ds.borderColor = ds._defaultBackgroundColor;
+                                }
+                            });
+                            chart._isolatedDatasetIndex = datasetIndex;
+                        }
+                        chart.update();
+                    },
+                    labels: { usePointStyle: true, padding: 10 }
+                },
+                tooltip: {
+                    // Use callbacks for custom tooltip content
+                    callbacks: {
+                        // ** Use the 'title' callback for 'Název' **
+                        // It's typically bold by default.
+                        title: function(tooltipItems) {
+                            // tooltipItems is an array, we usually use the first item
+                            if (!tooltipItems.length) {
+                                return '';
+                            }
+                            const context = tooltipItems[0];
+                            const meta = pointMeta(context);
+
+                            // Check if 'Název' exists in our meta data
+                            if (meta.hasOwnProperty('Název')) {
+                                // Split the 'Název' string by '<br>' to create multiple lines
+                                // Chart.js handles an array return as multiple title lines
+                                return meta['Název'].split('<br>');
+                            }
+                            return ''; // Return empty string if no 'Název'
+                        },
+
+                        // ** Optional: Add space after title if Název existed **
+                        afterTitle: function(tooltipItems) {
+                            const context = tooltipItems[0];
+                            const meta = pointMeta(context);
+                            // Add space only if Název was shown and there are other items
+                            if (meta.hasOwnProperty('Název') && Object.keys(meta).length > 1) {
+                                 // Return an empty string or one with just space to force a line
+                                return ' '; // Creates visual separation
+                            }
+                            return '';
+                        },
+
+
+                        // ** Use 'beforeBody' to generate the Key: Value lines for other items **
+                        // Returns an array of strings, each becoming a line in the tooltip body.
+                        beforeBody: function(tooltipItems) {
+                            const context = tooltipItems[0];
+                            const meta = pointMeta(context);
+                            const bodyLines = []; // Array to hold our custom body lines
+
+                            if (meta) {
+                                // Iterate through the keys (already sorted in Python)
+                                for (const key in meta) {
+                                    // Make sure the key is not 'Název' (already handled in title)
+                                    if (key !== 'Název' && meta.hasOwnProperty(key)) {
+                                        // Format as "Key: Value"
+                                        bodyLines.push(`${key}: ${meta[key]}`);
+                                    }
+                                }
+                            }
+                            return bodyLines; // Return the array of lines
+                        },
+
+                        // ** Disable the default label **
+                        // Since we are generating the body content in beforeBody,
+                        // we don't need the default label (which usually shows dataset label & y-value).
+                        label: function(context) {
+                            return null; // Returning null prevents the default label line
+                        },
+
+                        // ** Optional: Hide the color swatch next to the label **
+                        // Since we disabled the default label, you might not want the color box either.
+                        labelColor: function(context) {
+                            return null; // Returning null hides the color box
+                            // Alternative: return { borderColor: 'transparent', backgroundColor: 'transparent' };
+                        }
+
+                    } // end callbacks
+                } // end tooltip
+            }
+        }
+    });
+    chart.$metaKeys = payload.keys;
+
+    // Optional: Add logic to reset hover state if mouse leaves canvas
+    canvas.addEventListener('mouseout', () => {
+        resetColors(chart);
+        chart.update('none');
+    });
+    return chart;
+}
@@ -0,0 +1,74 @@
+// Frontend of the bubble_chart component (mapatools/chartjsbubble.py), speaking Streamlit's
+// custom component protocol directly. The chart is created on the first render and then only
+// receives diffs: every render carries a spec
+//   {version, base, options, reset: payload} or {version, base, options, diff}
+// where a diff applies to the data of version `base`. If the chart is not at `base` (e.g. after a
+// reload of the iframe) it asks Python for a full reset instead.
+
+var chart = null;
+var version = null;
+var library = null;
+var height = null;
+
+function sendMessage(type, data) {
+    window.parent.postMessage(Object.assign({ isStreamlitMessage: true, type: type }, data), '*');
+}
+
+// Events go back to Python as the component value; the nonce makes every event a new value
+function sendEvent(event) {
+    event.nonce = Date.now() + Math.random();
+    sendMessage('streamlit:setComponentValue', { value: event, dataType: 'json' });
+}
+
+// Chart.js is loaded once, from the URL resolved by mapatools.assets.library_url.
+// Relative URLs are relative to the app, which serves this file at {app}/component/{name}/index.html
+function loadLibrary(url) {
+    if (library === null) {
+        library = new Promise((resolve, reject) => {
+            const script = document.createElement('script');
+            script.src = new URL(url, new URL('../../', document.baseURI)).href;
+            script.onload = resolve;
+            script.onerror = reject;
+            document.head.appendChild(script);
+        });
+    }
+    return library;
+}
+
+function render(spec) {
+    if (spec.version === version) {
+        return; // A rerun without changes sends the same spec again
+    }
+    if (spec.reset === undefined && (chart === null || spec.base !== version)) {
+        sendEvent({ event: 'resync' });
+        return;
+    }
+    if (chart === null) {
+        chart = createBubbleChart(document.getElementById('bubbleChart'), spec.options, spec.reset,
+                                  id => sendEvent({ event: 'click', id: id }));
+    } else {
+        setBubbleOptions(chart, spec.options);
+        if (spec.reset !== undefined) {
+            setBubbleData(chart, spec.reset);
+        } else {
+            applyBubbleDiff(chart, spec.diff);
+        }
+        chart.update('none');
+    }
+    version = spec.version;
+}
+
+window.addEventListener('message', event => {
+    if (event.data.type !== 'streamlit:render') {
+        return;
+    }
+    const args = event.data.args;
+    if (args.height !== height) {
+        height = args.height;
+        sendMessage('streamlit:setFrameHeight', { height: height });
+    }
+    // Renders are applied in order, after the library has loaded
+    loadLibrary(args.library).then(() => render(JSON.parse(args.spec)));
+});
+
+sendMessage('streamlit:componentReady', { apiVersion: 1 });
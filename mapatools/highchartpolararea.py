@@ -1,9 +1,39 @@
-import json
+import pandas as pd
 
-def chart_highcharts_variable_pie(filtered_df_2022, filtered_df_2023,
+from mapatools.serialize import to_json
+from mapatools.assets import script_tags
+
+def export_by_group(filtered_df_from, filtered_df_to, group_fields=("Skupina", "Kategorie"), export_col='ExportValueCZK'):
+    """
+    Exports of the filtered products per group, for each field in `group_fields`.
+
+    Returns {field: DataFrame indexed by group name with export_from, export_to and color}; products
+    without a group are kept, under a NaN group.
+    Each year is aggregated with one groupby per field (sum + first color) and the years are merged
+    once, so both pies are built from a single pass over the rows.
+    """
+    exports = {}
+    for field in group_fields:
+        by_year = [
+            df.groupby(field, observed=True, dropna=False).agg(export=(export_col, "sum"), color=("Barva " + field, "first"))
+            for df in (filtered_df_from, filtered_df_to)
+        ]
+        merged = by_year[0].join(by_year[1], how="outer", lsuffix="_from", rsuffix="_to")
+        merged.index = merged.index.astype(object)
+        merged = merged.astype({"color_from": object, "color_to": object}).sort_index()
+        exports[field] = pd.DataFrame({
+            "export_from": merged["export_from"].fillna(0),
+            "export_to": merged["export_to"].fillna(0),
+            # Color from either year (prefer the later one)
+            "color": merged["color_to"].fillna(merged["color_from"]).fillna("#000000"),
+        })
+    return exports
+
+
+def chart_highcharts_variable_pie(exports,
                                   total_export_22, total_export_23,
                                   green_total_22, green_total_23,
-                                  group_field,
+                                  green_total_22_filtered=None, green_total_23_filtered=None,
                                   usd_to_czk_22=23.360,
                                   usd_to_czk_23=22.21,
                                   chart_title="Export růst mezi lety 2022 a 2024",
@@ -15,15 +45,17 @@ def chart_highcharts_variable_pie(filtered_df_2022, filtered_df_2023,
     Creates a Highcharts variable pie chart showing green export growth.
     Includes both filtered green categories and (optionally) non-green and unclassified green.
 
+    `exports` is one field's frame from export_by_group; green_total_22/23_filtered are the
+    filtered exports of each year (default: the sums of `exports`).
     If `relative_to_green_only` is True or total_export_22/23 are None, then
     slice angles (y) are calculated as share of green exports only.
     """
 
     # All values are in CZK — usd_to_czk_22/23 kept in signature for compatibility but not used
-    export_col_from = 'Český export ' + year_from + ' CZK'
-    export_col_to = 'Český export ' + year_to + ' CZK'
-    green_total_22_filtered = filtered_df_2022[export_col_from].sum()
-    green_total_23_filtered = filtered_df_2023[export_col_to].sum()
+    if green_total_22_filtered is None:
+        green_total_22_filtered = exports["export_from"].sum()
+    if green_total_23_filtered is None:
+        green_total_23_filtered = exports["export_to"].sum()
 
     # Compute unfiltered other-green portion
     other_green_22 = green_total_22 - green_total_22_filtered
@@ -67,18 +99,9 @@ def chart_highcharts_variable_pie(filtered_df_2022, filtered_df_2023,
         })
 
     # Add each filtered green category
-    green_cats = sorted(set(filtered_df_2022[group_field]) | set(filtered_df_2023[group_field]))
-
-    for cat in green_cats:
-        export_22 = filtered_df_2022.loc[filtered_df_2022[group_field] == cat, export_col_from].sum()
-        export_23 = filtered_df_2023.loc[filtered_df_2023[group_field] == cat, export_col_to].sum()
+    for cat, export_22, export_23, color in zip(exports.index, exports["export_from"], exports["export_to"], exports["color"]):
         growth = (export_23 - export_22) / export_22 if export_22 > 0 else 0
 
-        # Get color from either dataset (prefer 2023, fallback to 2022)
-        color_2023 = filtered_df_2023.loc[filtered_df_2023[group_field] == cat, "Barva " + group_field]
-        color_2022 = filtered_df_2022.loc[filtered_df_2022[group_field] == cat, "Barva " + group_field]
-        color = color_2023.iloc[0] if not color_2023.empty else (color_2022.iloc[0] if not color_2022.empty else "#000000")
-
         data_series.append({
             "name": cat,
             "y": export_23 / denominator,
@@ -128,12 +151,11 @@ def chart_highcharts_variable_pie(filtered_df_2022, filtered_df_2023,
         }]
     }
 
-    config_json = json.dumps(chart_config)
+    config_json = to_json(chart_config)
 
     chart_html = f"""
     <div id="container" style="width: 100%; height: 700px;"></div>
-    <script src="https://code.highcharts.com/highcharts.js"></script>
-    <script src="https://code.highcharts.com/modules/variable-pie.js"></script>
+    {script_tags('highcharts', 'variable-pie')}
     <script>
       document.addEventListener('DOMContentLoaded', function () {{
         Highcharts.chart('container', {config_json});
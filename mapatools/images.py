@@ -0,0 +1,118 @@
+# Resized and recompressed variants of the page images, linked through srcset/image-set so that
+# each screen downloads a variant of about the size it shows. Build them with
+# `python -m mapatools.images` (from the app root, needs Pillow with AVIF support) whenever an
+# image changes and ship VARIANT_DIR with the app; the app itself only looks the files up.
+import glob
+import os
+import re
+
+import streamlit as st
+
+from mapatools.assets import file_digest
+
+VARIANT_DIR = 'static/responsive'
+VARIANT_URL = 'app/static/responsive'
+
+# Source images: widths (px) of their variants; widths above an image's own width are skipped
+IMAGE_WIDTHS = {
+    'resources/header.jpg': (960, 1920, 3000),
+    'resources/partners/*.png': (100, 200, 300),
+}
+# Variant formats, most preferred first: (extension, MIME type, Pillow save options)
+FORMATS = [
+    ('avif', 'image/avif', {'quality': 55}),
+    ('webp', 'image/webp', {'quality': 80, 'method': 6}),
+]
+
+
+def variant_name(path, digest, width, extension):
+    # The content hash in the name ties a variant to one version of its source
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f'{stem}-{digest}-{width}w.{extension}'
+
+
+def build_variants(variant_dir=VARIANT_DIR):
+    """Write the missing variants of every image in IMAGE_WIDTHS and delete outdated ones."""
+    from PIL import Image
+
+    os.makedirs(variant_dir, exist_ok=True)
+    expected = set()
+    for pattern, widths in IMAGE_WIDTHS.items():
+        for path in sorted(glob.glob(pattern)):
+            digest = file_digest(path)
+            with Image.open(path) as image:
+                for width in widths:
+                    if width > image.width:
+                        continue
+                    resized = None
+                    for extension, _, options in FORMATS:
+                        filename = variant_name(path, digest, width, extension)
+                        expected.add(filename)
+                        target = os.path.join(variant_dir, filename)
+                        if os.path.exists(target):
+                            continue
+                        if resized is None:
+                            height = round(image.height * width / image.width)
+                            resized = image.resize((width, height), Image.LANCZOS)
+                        resized.save(target + '.tmp', format=extension.upper(), **options)
+                        os.replace(target + '.tmp', target)
+                        print(f'Saved {target} ({os.path.getsize(target) / 1024:.0f} kB)')
+    for filename in sorted(set(os.listdir(variant_dir)) - expected):
+        os.remove(os.path.join(variant_dir, filename))
+        print(f'Removed {filename}')
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _variants(path, mtime, variant_dir, variant_dir_mtime):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    digest = file_digest(path)
+    pattern = re.compile(rf'{re.escape(stem)}-{digest}-(\d+)w\.(\w+)$')
+    found = {}
+    for filename in os.listdir(variant_dir):
+        match = pattern.match(filename)
+        if match:
+            found.setdefault(match.group(2), []).append((int(match.group(1)), f'{VARIANT_URL}/{filename}'))
+    return {mime: sorted(found[extension]) for extension, mime, _ in FORMATS if extension in found}
+
+
+def image_variants(path, variant_dir=VARIANT_DIR):
+    """{MIME type: [(width, URL)] by width} of the built variants of the current version of `path`.
+
+    Most preferred format first; empty when static serving is off or no variants were built.
+    Looked up once per process, version of the file and state of `variant_dir` (their mtimes), so
+    variants built while the app runs are picked up.
+    """
+    if not st.get_option('server.enableStaticServing') or not os.path.isdir(variant_dir):
+        return {}
+    return _variants(path, os.path.getmtime(path), variant_dir, os.path.getmtime(variant_dir))
+
+
+def _at_least(variants, width):
+    # The narrowest variant at least `width` wide, or the widest one
+    return next((url for w, url in variants if w >= width), variants[-1][1])
+
+
+def background_css(path, width, fallback):
+    """CSS background-image declarations showing `path` about `width` CSS px wide.
+
+    Browsers pick the first format they support from image-set(); those without image-set type()
+    support keep the plain url() before it. Without variants only `fallback` is used.
+    """
+    variants = image_variants(path)
+    if not variants:
+        return f'background-image: url("{fallback}");'
+    urls = {mime: _at_least(sizes, width) for mime, sizes in variants.items()}
+    options = [f'url("{url}") type("{mime}")' for mime, url in urls.items()]
+    return (f'background-image: url("{list(urls.values())[-1]}");\n'
+            f'                background-image: image-set({", ".join(options)});')
+
+
+def picture_tag(path, fallback, sizes):
+    """<picture> of `path` with a srcset per format, sized by the `sizes` attribute; <img src=fallback> without variants."""
+    sources = [f'<source type="{mime}" srcset="{", ".join(f"{url} {w}w" for w, url in widths)}" sizes="{sizes}">'
+               for mime, widths in image_variants(path).items()]
+    return f'<picture>{"".join(sources)}<img src="{fallback}"></picture>' if sources else f'<img src="{fallback}">'
+
+
+if __name__ == '__main__':
+    build_variants()
@@ -0,0 +1,51 @@
+import json
+
+import numpy as np
+
+# orjson is optional: it is used when installed, otherwise the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def to_json(obj):
+    """Compact JSON text of `obj`, which may contain NumPy arrays and scalars.
+
+    Numeric NumPy arrays are written directly by orjson; other arrays (e.g. of strings) go
+    through tolist(). Non-ASCII text is kept as is. NaN and infinities are written as null by
+    both paths, so the text is also valid for JSON.parse.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_numpy_default, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(_finite(obj), default=_numpy_default, ensure_ascii=False, separators=(',', ':'),
+                      allow_nan=False)
+
+
+def _finite(value):
+    # The stdlib json module would write NaN/Infinity, which JSON.parse rejects
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return _finite(value.tolist())
+    if isinstance(value, (float, np.floating)):
+        return float(value) if np.isfinite(value) else None
+    return value
+
+
+def _numpy_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def rounded(values, decimals=None):
+    """`values` as an array, floats rounded to `decimals` (None keeps full precision)."""
+    values = np.asarray(values)
+    if decimals is None or not np.issubdtype(values.dtype, np.floating):
+        return values
+    return np.round(values, decimals)
@@ -1,40 +1,85 @@
-def get_plot_and_hover_display_names(year_placeholder):
-    plot_display_names = [
-        'Percentil příbuznosti '+year_placeholder+'',
-        'Percentil komplexity '+year_placeholder+'',
-        'Pořadí Česka na světovém trhu '+year_placeholder+'',
-        'Komplexita výrobku (unikátnost) '+year_placeholder+'',
-        'Český export '+year_placeholder+' CZK',
-        'Český export '+year_placeholder+' USD',
-        'Velikost světového trhu '+year_placeholder+' CZK',
-        'Velikost světového trhu '+year_placeholder+' USD',
-        'Podíl Česka na světovém trhu '+year_placeholder+' %',
-        'Koncentrace světového trhu '+year_placeholder+'',
-        'Koncentrace evropského exportu '+year_placeholder+'',
-    ]
+# Display label of each data column; {year} is filled in only when rendering
+DISPLAY_NAMES = {
+    'relatedness_Percentile': 'Percentil příbuznosti {year}',
+    'PCI_Percentile': 'Percentil komplexity {year}',
+    'export_Rank': 'Pořadí Česka na světovém trhu {year}',
+    'pci': 'Komplexita výrobku (unikátnost) {year}',
+    'ExportValueCZK': 'Český export {year} CZK',
+    'ExportValue': 'Český export {year} USD',
+    'WorldExportCZK': 'Velikost světového trhu {year} CZK',
+    'WorldExport': 'Velikost světového trhu {year} USD',
+    'WorldMarketShare': 'Podíl Česka na světovém trhu {year} %',
+    'hhi': 'Koncentrace světového trhu {year}',
+    'euhhi': 'Koncentrace evropského exportu {year}',
+    'relatedness': 'Příbuznost CZ {year}',
+    'EUTopExporter': 'EU Největší Exportér {year}',
+    'rca': 'RCA {year}',
+    'HS_ID': 'Kód výrobku HS6',
+    'CZ_Nazev': 'Název',
+}
 
-    hover_display_data = [
-        'Kód výrobku HS6',
-        'Skupina',
-        'Podskupina',
-        'Název',
-        'Příbuznost CZ '+year_placeholder+'',
-        'EU Největší Exportér '+year_placeholder+'',
-        'Komplexita výrobku (unikátnost) '+year_placeholder+'',
-        'Český export '+year_placeholder+' CZK',
-        'Český export '+year_placeholder+' USD',
-        'Pořadí Česka na světovém trhu '+year_placeholder+'',
-        'Velikost světového trhu '+year_placeholder+' CZK',
-        'Velikost světového trhu '+year_placeholder+' USD',
-        'Podíl Česka na světovém trhu '+year_placeholder+' %',
-        'Percentil příbuznosti '+year_placeholder+'',
-        'Percentil komplexity '+year_placeholder+'',
-        'Koncentrace světového trhu '+year_placeholder+'',
-        'Koncentrace evropského exportu '+year_placeholder+'',
-        'RCA '+year_placeholder+'',
+plot_columns = [
+    'relatedness_Percentile',
+    'PCI_Percentile',
+    'export_Rank',
+    'pci',
+    'ExportValueCZK',
+    'ExportValue',
+    'WorldExportCZK',
+    'WorldExport',
+    'WorldMarketShare',
+    'hhi',
+    'euhhi',
+]
 
-    ]
-    return plot_display_names, hover_display_data
+hover_columns = [
+    'HS_ID',
+    'Skupina',
+    'Podskupina',
+    'CZ_Nazev',
+    'relatedness',
+    'EUTopExporter',
+    'pci',
+    'ExportValueCZK',
+    'ExportValue',
+    'export_Rank',
+    'WorldExportCZK',
+    'WorldExport',
+    'WorldMarketShare',
+    'relatedness_Percentile',
+    'PCI_Percentile',
+    'hhi',
+    'euhhi',
+    'rca',
+]
+
+
+# Decimals of a plotted column sent to the browser — enough for a 1500 px wide chart
+plot_decimals = {
+    'relatedness_Percentile': 2,
+    'PCI_Percentile': 2,
+    'export_Rank': 0,
+    'pci': 4,
+    'ExportValueCZK': 0,
+    'ExportValue': 0,
+    'WorldExportCZK': 0,
+    'WorldExport': 0,
+    'WorldMarketShare': 4,
+    'hhi': 5,
+    'euhhi': 5,
+}
+
+
+def display_name(column, year):
+    return DISPLAY_NAMES.get(column, column).format(year=year)
+
+
+def display_names(year):
+    return {column: display_name(column, year) for column in DISPLAY_NAMES}
+
+
+def get_plot_decimals(year):
+    return {display_name(column, year): decimals for column, decimals in plot_decimals.items()}
 
 
 def get_hover_formatting(year):
@@ -72,12 +117,13 @@ def get_hover_formatting(year):
     ]
     return no_decimal,two_sigfig,percentage,texthover
 
-def get_hover_data(year,year_placeholder,hover_info,x_axis,y_axis,markersize):
+def get_hover_data(year,hover_info,x_axis,y_axis,markersize):
+    # Takes data columns and returns the hover settings keyed by their display names for `year`
     hover_data = {}
     no_decimal,two_sigfig,percentage,texthover = get_hover_formatting(year)
     
     # Iterate over the columns in hover_info
-    hover_info_year = [text.replace(year_placeholder,year) for text in hover_info]
+    hover_info_year = [display_name(col,year) for col in hover_info]
     for col in hover_info_year:
         # If the column is in no_decimal, format with no decimals and thousands separator
         if col in no_decimal:
@@ -93,9 +139,9 @@ def get_hover_data(year,year_placeholder,hover_info,x_axis,y_axis,markersize):
             hover_data[col] = False  # No formatting needed, just show the column
         
     # Ensure x_axis, y_axis, and markersize default to False if not explicitly provided in hover_info
-    hover_data.setdefault(markersize, False)
-    hover_data.setdefault(x_axis, False)
-    hover_data.setdefault(y_axis, False)
+    hover_data.setdefault(display_name(markersize,year), False)
+    hover_data.setdefault(display_name(x_axis,year), False)
+    hover_data.setdefault(display_name(y_axis,year), False)
     hover_data.setdefault('Skupina', False)
     hover_data.setdefault('Podskupina', False)
     hover_data.setdefault('Název', True)
@@ -1,13 +1,35 @@
 import streamlit as st
 import base64
+import mimetypes
+import os
 
-def load_visual_identity(header_image_path, background_image_path = 'resources/background.svg'):
-    # Load the image and encode it in Base64 format
-    with open(header_image_path, "rb") as image_file:
-        header_image = base64.b64encode(image_file.read()).decode("utf-8")
-    # Load the image and encode it in Base64 format
-    with open(background_image_path, "rb") as image_file:
-        background_image = base64.b64encode(image_file.read()).decode("utf-8")
+from mapatools.assets import static_copy_url
+from mapatools.images import background_css, picture_tag
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def _data_uri(path, mtime):
+    with open(path, "rb") as f:
+        return f"data:{mimetypes.guess_type(path)[0]};base64,{base64.b64encode(f.read()).decode()}"
+
+
+def image_src(path):
+    """src of an image for the page: its static URL when the app serves a copy of it, else a data URI.
+
+    The data URI is encoded once per process and version of the file (its mtime), so reruns reuse it.
+    """
+    return static_copy_url(path) or _data_uri(path, os.path.getmtime(path))
+
+
+def load_visual_identity(header_image_path, background_image_path = 'resources/background.svg', responsive_images=True):
+    # Static URLs keep the megabyte-sized images out of the markup sent on every rerun
+    header_image = image_src(header_image_path)
+    background_image = image_src(background_image_path)
+    # With responsive_images, screens get the built variants (mapatools/images.py) of about the width they show
+    if responsive_images:
+        header_css = {width: background_css(header_image_path, width, header_image) for width in (960, 1920, 3000)}
+    else:
+        header_css = dict.fromkeys((960, 1920, 3000), f'background-image: url("{header_image}");')
     # Load Montserrat font from Google Fonts
     st.markdown(
         """
@@ -56,7 +78,7 @@ def load_visual_identity(header_image_path, background_image_path = 'resources/b
                 right: 0vw; /* start from the right-ish */
                 width: 40vw; /* not too large */
                 height: 40vw;
-                background-image: url("data:image/svg+xml;base64,{background_image}");
+                background-image: url("{background_image}");
                 background-repeat: no-repeat;
                 background-size: contain;
                 background-position: center;
@@ -73,7 +95,7 @@ def load_visual_identity(header_image_path, background_image_path = 'resources/b
                 overflow-x: hidden;
                 width: 120vw;
                 height: 35vh;  /* Adjust height as needed */
-                background-image: url("data:image/jpg;base64,{header_image}");
+                {header_css[1920]}
                 background-size: cover;
                 background-position: center;
                 background-repeat: no-repeat;
@@ -88,6 +110,7 @@ def load_visual_identity(header_image_path, background_image_path = 'resources/b
                     left: -30vw;
                     width: 150vw;
                     height: 160vh;  /* Smaller height on phones */
+                    {header_css[960]}
                 }}
                 .header-gradient {{
                     height: 60%;  /* Match header-image height */
@@ -95,6 +118,12 @@ def load_visual_identity(header_image_path, background_image_path = 'resources/b
 
                     }}
             }}
+            /* Full-size header on wide screens */
+            @media only screen and (min-width: 1600px) {{
+                .header-image {{
+                    {header_css[3000]}
+                }}
+            }}
             /* Extend the gradient to blend into content smoothly */
             .header-gradient {{
                 position: absolute;
@@ -150,11 +179,7 @@ def load_visual_identity(header_image_path, background_image_path = 'resources/b
     logocol2.text("")
     logocol2.text("")
 
-    def img_to_base64(path):
-        with open(path, "rb") as f:
-            return base64.b64encode(f.read()).decode()
-
-    # Convert all logos to base64
+    # Partner logos
     logos = [
         "resources/partners/01.png",
         "resources/partners/07.png",
@@ -165,9 +190,11 @@ def load_visual_identity(header_image_path, background_image_path = 'resources/b
         "resources/partners/06.png",
         "resources/partners/02.png",
     ]
-    logo_tags = [
-        f'<img src="data:image/png;base64,{img_to_base64(path)}">' for path in logos
-    ]
+    if responsive_images:
+        # Logos are shown at most 100px wide
+        logo_tags = [picture_tag(path, image_src(path), '100px') for path in logos]
+    else:
+        logo_tags = [f'<img src="{image_src(path)}">' for path in logos]
 
     # Display logos in a responsive container
     logocol2.markdown(
@@ -180,6 +207,10 @@ def load_visual_identity(header_image_path, background_image_path = 'resources/b
             justify-content: space-between;
             gap: 10px;
         }}
+        /* A <picture> lays out as its <img> */
+        .logo-container picture {{
+            display: contents;
+        }}
         .logo-container img {{
             max-height: 100px;
             max-width: 100px;
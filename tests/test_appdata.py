@@ -0,0 +1,56 @@
+# Years are addressed by row position, so a year written in another product order must still line up
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from mapatools.appdata import APP_DATA_DIR, YearRegistry
+from mapatools.filtering import year_rows
+
+APP_DATA = os.path.join(os.path.dirname(__file__), '..', APP_DATA_DIR)
+
+
+@pytest.fixture
+def reordered(tmp_path):
+    # CZE_2024 with its rows reversed, next to the other years as written
+    for name in os.listdir(APP_DATA):
+        if name.endswith('.parquet'):
+            shutil.copy(os.path.join(APP_DATA, name), tmp_path / name)
+    table = pq.read_table(tmp_path / 'CZE_2024.parquet')
+    pq.write_table(table.take(np.arange(table.num_rows)[::-1]), tmp_path / 'CZE_2024.parquet')
+    return tmp_path
+
+
+def test_years_in_other_product_order_line_up(reordered):
+    expected = YearRegistry(directory=APP_DATA)
+    data = YearRegistry(directory=reordered)
+    data.load(['2023', '2024'])
+    for year in ('2022', '2023', '2024'):
+        # Categorical columns of a concatenated table may come back as object, so values are compared
+        pd.testing.assert_frame_equal(data[year], expected[year], check_dtype=False,
+                                      check_categorical=False)
+        filters = [('ExportValueCZK', (1e9, np.inf))]
+        selected = data.frame(year, year_rows(data, year, filters=filters))
+        pd.testing.assert_frame_equal(selected, expected.frame(year, year_rows(expected, year, filters=filters)),
+                                      check_dtype=False, check_categorical=False)
+        assert (selected['ExportValueCZK'] >= 1e9).all()
+
+
+def test_unknown_products_are_rejected(reordered):
+    table = pq.read_table(reordered / 'CZE_2024.parquet')
+    pq.write_table(table.slice(1), reordered / 'CZE_2024.parquet')
+    data = YearRegistry(directory=reordered)
+    data.load(['2024'])
+    with pytest.raises(ValueError, match='2022 app dataset'):
+        data.load(['2022'])
+
+
+def test_years_without_a_rate_are_not_offered(tmp_path):
+    for year in ('2024', '2025'):
+        shutil.copy(os.path.join(APP_DATA, 'CZE_2024.parquet'), tmp_path / f'CZE_{year}.parquet')
+    assert YearRegistry(directory=tmp_path).years == ['2024']
@@ -0,0 +1,16 @@
+# Chart fingerprints must tell apart frames that differ only in their index
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from mapatools.cache import fingerprint
+
+
+def test_index_is_part_of_the_fingerprint():
+    pie = pd.DataFrame({'ExportValueCZK': [1.0, 2.0], 'Barva Skupina': ['#aaa', '#bbb']},
+                       index=pd.Index(['Energie', 'Doprava'], name='Skupina'))
+    assert fingerprint(pie) == fingerprint(pie.copy())
+    assert fingerprint(pie) != fingerprint(pie.rename(index={'Energie': 'Budovy'}))
+    assert fingerprint(pie) != fingerprint(pie.rename_axis('Kategorie'))
@@ -0,0 +1,64 @@
+# The per-year product space shared by all countries (user-008) must match the old per-country computation.
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'BACI_analysis'))
+ECIPCI = pytest.importorskip('ECIPCI')
+
+YEARS = [2022, 2023, 2024]
+COUNTRIES = ['CZE', 'DEU', 'POL', 'FRA', 'SVK', 'USA', 'CHN', 'JPN']
+
+
+def old_hhi(group):
+    market_share = group["val"] / group["val"].sum()
+    return (market_share ** 2).sum()
+
+
+def old_product_space(cdata):
+    # get_product_space as it was before, with the per-product apply for HHI
+    EU_data = cdata[cdata['loc'].isin(ECIPCI.EU_iso3)]
+    hhi = cdata.groupby("prod").apply(old_hhi, include_groups=False).reset_index()
+    euhhi = EU_data.groupby("prod").apply(old_hhi, include_groups=False).reset_index()
+    hhi.rename(columns={0: 'hhi'}, inplace=True)
+    euhhi.rename(columns={0: 'euhhi'}, inplace=True)
+    WorldExport = cdata[['prod', 'val']].groupby('prod').agg('sum').reset_index()
+    EUExport = EU_data[['prod', 'val']].groupby('prod').agg('sum').reset_index()
+    WorldExport.rename(columns={'val': 'WorldExport'}, inplace=True)
+    EUExport.rename(columns={'val': 'EUExport'}, inplace=True)
+    EUTopExporter = EU_data.loc[EU_data.groupby('prod')['val'].idxmax(), ['prod', 'loc']].reset_index(drop=True)
+    EUTopExporter.rename(columns={'loc': 'EUTopExporter'}, inplace=True)
+    ProductSpace = WorldExport.merge(EUExport, left_on='prod', right_on='prod')
+    ProductSpace = ProductSpace.merge(EUTopExporter, left_on='prod', right_on='prod')
+    ProductSpace['EUWorldMarketShare'] = ProductSpace['EUExport'] / ProductSpace['WorldExport']
+    ProductSpace = ProductSpace.merge(hhi, left_on='prod', right_on='prod')
+    ProductSpace = ProductSpace.merge(euhhi, left_on='prod', right_on='prod')
+    return ProductSpace
+
+
+@pytest.fixture
+def cdata_by_year():
+    rng = np.random.default_rng(8)
+    frames = {}
+    for year in YEARS:
+        rows = pd.MultiIndex.from_product([COUNTRIES, range(100, 130)], names=['loc', 'prod']).to_frame(index=False)
+        rows = rows[rng.random(len(rows)) < 0.8]  # not every country exports every product
+        rows['val'] = rng.lognormal(10, 2, len(rows))
+        rows['time'] = year
+        frames[year] = rows.reset_index(drop=True)
+    return frames
+
+
+def test_product_space_per_year_matches_per_country(cdata_by_year):
+    cdata = pd.concat(cdata_by_year.values(), ignore_index=True)
+    for year in YEARS:
+        shared = ECIPCI.get_product_space(cdata_by_year[year])
+        for country in COUNTRIES:
+            output = cdata[(cdata['time'] == year) & (cdata['loc'] == country)]
+            old = output.merge(old_product_space(cdata[cdata['time'] == year]), left_on='prod', right_on='prod')
+            new = output.merge(shared, left_on='prod', right_on='prod')
+            pd.testing.assert_frame_equal(new[old.columns].reset_index(drop=True), old.reset_index(drop=True),
+                                          check_exact=False, rtol=1e-12)
@@ -0,0 +1,22 @@
+# to_json output must be valid for JSON.parse, with or without orjson
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from mapatools import serialize
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_non_finite_floats_become_null(monkeypatch, use_orjson):
+    if use_orjson and serialize.orjson is None:
+        pytest.skip('orjson is not installed')
+    if not use_orjson:
+        monkeypatch.setattr(serialize, 'orjson', None)
+    text = serialize.to_json({'x': np.array([1.5, np.nan, np.inf]), 'y': [float('nan'), np.float32(2.5)],
+                              'label': np.array(['Název'], dtype=object)})
+    assert json.loads(text, parse_constant=lambda name: pytest.fail(f'{name} in {text}')) == \
+        {'x': [1.5, None, None], 'y': [None, 2.5], 'label': ['Název']}